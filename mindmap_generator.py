@@ -5,396 +5,1060 @@ Takes a prompt and returns detailed XML mindmap representation with comprehensiv
 """
 
 import asyncio
-import json
+import functools
+import hashlib
+import logging
+import logging.handlers
 import os
+import queue
+import re
+import sqlite3
+import sys
 import time
 import uuid
+import zlib
+from collections import OrderedDict, defaultdict
+from contextlib import closing
+from dataclasses import dataclass, fields
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Set, Tuple
 
-from anthropic import AsyncAnthropic
+import fastjsonschema
+import httpx
+import json_repair
+import orjson
+from anthropic import (APIConnectionError, APIStatusError, APITimeoutError, AsyncAnthropic, InternalServerError,
+                       RateLimitError)
+from lxml import etree
 
 PARSE_MODEL = "claude-sonnet-4-20250514"
-STRUCTURE_MODEL = "claude-3-5-haiku-20241022"
-GENERATE_XML_MODEL = "claude-sonnet-4-20250514"
+# XML generation is a mechanical transform, so it runs on Haiku with a worked example;
+# Sonnet is only used when Haiku's output still fails local checks after correction
+GENERATE_XML_MODEL = "claude-3-5-haiku-20241022"
+XML_FALLBACK_MODEL = "claude-sonnet-4-20250514"
 VALIDATE_XML_MODEL = "claude-3-5-haiku-20241022"
 
-class MindmapGenerator:
-    """Enhanced mindmap generator with detailed node information using Claude for each processing step"""
+# Number of finished mindmaps kept in memory per generator
+RESPONSE_CACHE_SIZE = 256
+
+# On-disk cache of per-stage outputs, so reruns resume from the first uncached stage
+STAGE_CACHE_PATH = os.getenv("MINDMAP_STAGE_CACHE", ".mindmap_cache.sqlite3")
+STAGE_CACHE_TTL = 7 * 24 * 60 * 60
+
+# Concurrent Anthropic requests per generator, and attempts made on rate limits or transient API errors
+MAX_CONCURRENT_REQUESTS = int(os.getenv("ANTHROPIC_MAX_CONCURRENCY", "5"))
+RATE_LIMIT_RETRIES = 5
+
+# Pooled HTTP/2 connections to the API so bursts reuse warm TLS sessions instead of re-handshaking.
+# httpx drops idle connections after 5s by default, shorter than the gap between most generations
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=120.0)
+HTTP_TIMEOUT = httpx.Timeout(300.0, connect=10.0)
+
+# Output token caps per stage, matching the original per-call limits. MindmapGenerator.token_usage
+# records the largest output each stage produces and warns when a response hits its cap.
+PARSE_MAX_TOKENS = 4000
+GENERATE_XML_MAX_TOKENS = 6000
+VALIDATE_XML_MAX_TOKENS = 6000
+
+# End generation as soon as the document closes instead of running on into trailing chatter
+JSON_STOP_SEQUENCES = ["\n```"]
+XML_STOP_SEQUENCES = ["</mindmap>"]
+
+# Parse requests arriving within this many seconds share one Claude call (0 disables batching)
+PARSE_BATCH_WINDOW = float(os.getenv("MINDMAP_BATCH_WINDOW", "0"))
+PARSE_BATCH_SIZE = 4
+
+_TRAILING_COMMA_RE = re.compile(r',(\s*[}\]])')
+_WS_RE = re.compile(r'[\n\t]')
+_PUNCTUATION_RE = re.compile(r"[.,!?;:'\"`]")
+_INT_RE = re.compile(r'-?\d+')
+_HEX_COLOR_RE = re.compile(r'#[0-9a-fA-F]{6}')
+
+# Every concept needs what the local layout indexes; the first must also carry the detailed fields
+_CONCEPT_SCHEMA = {
+    "type": "object",
+    "required": ["id", "title"],
+    "properties": {
+        "id": {"type": "string"},
+        "title": {"type": "string"},
+        "description": {"type": "string"},
+        "category": {"type": "string"},
+        "level": {"type": "integer"},
+        "parent": {"type": ["string", "null"]}
+    }
+}
+_VALIDATE_PARSED = fastjsonschema.compile({
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "type": "object",
+    "required": ["main_topic", "topic_description", "mindmap_type", "concepts", "relationships"],
+    "properties": {
+        "concepts": {
+            "type": "array",
+            "minItems": 1,
+            "items": [{
+                **_CONCEPT_SCHEMA,
+                "required": ["id", "title", "description", "level", "what", "why", "how", "examples", "metrics"]
+            }],
+            "additionalItems": _CONCEPT_SCHEMA
+        },
+        "relationships": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["from", "to"],
+                "properties": {"from": {"type": "string"}, "to": {"type": "string"}}
+            }
+        }
+    }
+})
+
+# Fallback domain detection, checked in priority order against prompt words and word pairs
+_DOMAIN_KEYWORDS = {
+    "machine_learning": frozenset({"machine learning", "ml", "ai", "model", "algorithm", "data"}),
+    "software_architecture": frozenset({"architecture", "system", "software", "api", "database"}),
+    "business_strategy": frozenset({"business", "strategy", "marketing", "sales", "revenue"}),
+    "education": frozenset({"learn", "education", "course", "study", "training"}),
+}
+_STOP_WORDS = frozenset({
+    'a', 'an', 'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'from', 'about',
+    'how', 'what', 'when', 'where', 'why', 'create', 'make', 'generate', 'mindmap', 'map', 'system', 'design'
+})
+
+# Fallback templates, hydrated per prompt by _create_intelligent_fallback
+_PROCESS_FLOWS = {
+    "machine_learning": ("Data Collection", "Feature Engineering", "Model Training", "Validation", "Deployment", "Monitoring"),
+    "software_architecture": ("Requirements Analysis", "System Design", "Implementation", "Testing", "Deployment", "Maintenance"),
+    "business_strategy": ("Market Analysis", "Strategy Planning", "Resource Allocation", "Execution", "Performance Tracking"),
+}
+_DEFAULT_PROCESS_FLOW = ("Planning", "Design", "Implementation", "Testing", "Deployment")
+_PROCESS_CONCEPT_SKELETON = {"level": 1, "parent": "root", "category": "process"}
+_DOMAIN_TOOLS = {
+    "machine_learning": ("Python", "TensorFlow", "scikit-learn", "MLflow"),
+    "software_architecture": ("Docker", "Kubernetes", "AWS/Azure", "MongoDB"),
+    "business_strategy": ("Excel", "Tableau", "Salesforce", "HubSpot"),
+    "education": ("LMS Platform", "Assessment Tools", "Video Conferencing", "Analytics"),
+}
+_DEFAULT_TOOLS = ("Generic Tool 1", "Platform 2", "Framework 3")
+_DOMAIN_STAKEHOLDERS = {
+    "machine_learning": ("Data Scientists", "ML Engineers", "Product Managers"),
+    "software_architecture": ("Software Architects", "DevOps Engineers", "QA Team"),
+    "business_strategy": ("Business Analysts", "Executive Team", "Marketing"),
+    "education": ("Instructors", "Students", "Academic Administration"),
+}
+_DEFAULT_STAKEHOLDERS = ("Project Manager", "Technical Team", "Stakeholders")
+
+# Local layout: node_type colors, row geometry, and read-only defaults for missing concept fields
+_NODE_TYPE_COLORS = MappingProxyType({
+    "start": "#2c3e50",       # Dark blue-gray
+    "process": "#3498db",     # Blue
+    "decision": "#e74c3c",    # Red
+    "outcome": "#27ae60",     # Green
+    "checkpoint": "#f39c12",  # Orange
+    "end": "#9b59b6"          # Purple
+})
+_DEFAULT_NODE_COLOR = "#3498db"
+_LAYOUT_CENTER_X, _LAYOUT_START_Y = 400, 200
+_LAYOUT_SPACING_X, _LAYOUT_SPACING_Y = 220, 150
+_ROOT_NODE_SIZE, _NODE_SIZE = (200, 80), (180, 70)
+_DEFAULT_EXAMPLES = ("Example 1", "Example 2")
+_DEFAULT_METRICS = ("Metric 1", "Metric 2")
+_DEFAULT_DETAILS = ("Detail 1", "Detail 2")
+_DEFAULT_PROCESSES = ("Step 1", "Step 2")
+_DEFAULT_CONSIDERATIONS = ("Consideration 1",)
+_DEFAULT_TOOLS_TECHNOLOGIES = ("Tool 1",)
+_DEFAULT_STAKEHOLDER_ROLES = ("Role 1",)
+
+# Never fetch external resources or expand entities while checking generated XML
+_XML_PARSER = etree.XMLParser(resolve_entities=False, no_network=True)
+
+# Fields of the structured data that the XML stage actually renders
+_XML_HANDOFF_SCHEMA = {
+    "title": None,
+    "description": None,
+    "layout_type": None,
+    "domain": None,
+    "complexity": None,
+    "metadata": {"total_nodes", "max_depth"},
+    "nodes": {
+        "id", "title", "description", "level", "category", "expanded",
+        "x", "y", "width", "height", "color", "shape",
+        "details", "processes", "considerations"
+    },
+    "edges": {"id", "from", "to", "label", "description", "color", "weight", "style"}
+}
+
+# Static instructions are sent as cacheable system prompts so that only the
+# short per-request tail is re-processed on each call. Keep them free of any
+# per-request data so the cached prefix stays byte-identical.
+PARSE_SYSTEM_PROMPT = """You are an expert analyst creating a comprehensive mindmap for the topic given by the user.
+
+FIRST, analyze the domain and core workflow:
+1. Identify the domain (technology/business/education/science/healthcare/etc.)
+2. Determine the main process flow or system architecture
+3. Identify key decision points and branching logic
+4. Map out sequential steps and parallel processes
+
+Create a flowchart-style mindmap where each node contains rich information like a presentation slide.
+
+Return ONLY valid JSON - no extra text or explanations:
+
+{
+    "main_topic": "System/Process Name",
+    "topic_description": "Comprehensive overview with context and scope",
+    "mindmap_type": "flowchart",
+    "domain": "machine_learning",
+    "complexity_level": "intermediate",
+    "workflow_type": "sequential",
+    "concepts": [
+        {
+            "id": "root",
+            "title": "System Overview",
+            "description": "Complete system description with purpose and scope",
+            "level": 0,
+            "parent": null,
+            "category": "system",
+            "node_type": "start",
+            "what": "What this system does",
+            "why": "Business value and importance",
+            "how": "High-level approach and methodology",
+            "examples": ["Real example 1", "Use case 2"],
+            "metrics": ["Success metric 1", "KPI 2"],
+            "details": ["Technical requirement", "Key decision", "Success factor"],
+            "processes": ["Phase 1: Planning", "Phase 2: Implementation"],
+            "considerations": ["Major risk", "Best practice"],
+            "tools_technologies": ["Tool 1", "Technology 2"],
+            "stakeholders": ["Role 1", "Department 2"]
+        },
+        {
+            "id": "phase1",
+            "title": "Data Collection",
+            "description": "Comprehensive data gathering pipeline",
+            "level": 1,
+            "parent": "root",
+            "category": "process",
+            "node_type": "process",
+            "what": "Collect and validate data",
+            "why": "Quality data enables accurate predictions",
+            "how": "Automated ETL with validation",
+            "examples": ["Transaction logs", "User events"],
+            "metrics": ["Completeness: >95%", "Latency: <10min"],
+            "details": ["Multiple data sources", "Real-time streaming", "Quality checks"],
+            "processes": ["Source setup", "Validation", "Storage"],
+            "considerations": ["Privacy compliance", "Data retention"],
+            "tools_technologies": ["Apache Kafka", "Spark"],
+            "stakeholders": ["Data Engineers", "Privacy Team"]
+        }
+    ],
+    "relationships": [
+        {"from": "root", "to": "phase1", "type": "initiates", "description": "System starts with data collection"}
+    ]
+}
+
+Generate 6-8 main nodes with logical flow. Each node should contain detailed information.
+Use node_type values: start, process, decision, outcome, checkpoint, end
+Keep all text content under 100 characters per field to avoid JSON issues.
+Return only the JSON: no code fences or commentary before it, and end your JSON with } and nothing else.
+"""
 
-    def __init__(self, anthropic_api_key: str):
-        self.client = AsyncAnthropic(api_key=anthropic_api_key)
+GENERATE_XML_SYSTEM_PROMPT = """Generate a comprehensive XML mindmap from the detailed structured data and original prompt given by the user.
 
-    async def generate_mindmap(self, prompt: str) -> str:
-        """Main method to generate detailed mindmap XML from prompt"""
-        print(f"🧠 Starting enhanced mindmap generation for: '{prompt[:50]}...'")
+Create valid XML with this enhanced structure:
 
-        # Step 1: Parse prompt and extract detailed concepts
-        print("1️⃣ Parsing concepts and relationships with detailed analysis...")
-        parsed_data = await self._parse_concepts_detailed(prompt)
+<?xml version="1.0" encoding="UTF-8"?>
+<mindmap version="2.0" editable="true">
+    <metadata>
+        <title>{title}</title>
+        <description>{description}</description>
+        <created_at>{current_timestamp}</created_at>
+        <layout_type>{layout_type}</layout_type>
+        <domain>{domain}</domain>
+        <complexity>{complexity_level}</complexity>
+        <total_nodes>{node_count}</total_nodes>
+        <max_depth>{max_depth}</max_depth>
+        <generation_context>Generated from: {original_prompt}</generation_context>
+    </metadata>
+    <nodes>
+        <node id="{unique_id}" level="{level}" category="{category}" expanded="{true/false}">
+            <content>
+                <title>{node_title}</title>
+                <description>{detailed_description}</description>
+            </content>
+            <position x="{x_coord}" y="{y_coord}" width="{width}" height="{height}"/>
+            <style color="{hex_color}" shape="{shape}" border="{border_style}"/>
+            <details>
+                <item>{detail_1}</item>
+                <item>{detail_2}</item>
+            </details>
+            <processes>
+                <step>{process_1}</step>
+                <step>{process_2}</step>
+            </processes>
+            <considerations>
+                <point>{consideration_1}</point>
+                <point>{consideration_2}</point>
+            </considerations>
+        </node>
+    </nodes>
+    <edges>
+        <edge id="{edge_id}" source="{source_id}" target="{target_id}">
+            <label>{relationship_label}</label>
+            <description>{relationship_description}</description>
+            <style color="{hex_color}" weight="{thickness}" line_style="{solid/dashed}"/>
+        </edge>
+    </edges>
+</mindmap>
 
-        # Step 2: Structure the knowledge graph with detailed nodes
-        print("2️⃣ Building detailed knowledge structure...")
-        structured_data = await self._structure_knowledge_detailed(parsed_data, prompt)
+For example, given this request:
 
-        # Step 3: Generate comprehensive XML
-        print("3️⃣ Generating detailed XML mindmap...")
-        xml_content = await self._generate_detailed_xml(structured_data, prompt)
+Structured data: {"title":"Data Pipeline","description":"End-to-end data pipeline","layout_type":"sequential","domain":"technology","complexity":"intermediate","metadata":{"total_nodes":2,"max_depth":1},"nodes":[{"id":"root","title":"Data Pipeline","description":"End-to-end data pipeline","level":0,"category":"root","expanded":true,"x":400,"y":100,"width":200,"height":80,"color":"#2c3e50","shape":"rectangle","details":["Batch and streaming"],"processes":["Collect","Store"],"considerations":["Cost"]},{"id":"phase1","title":"Data Collection","description":"Comprehensive data gathering pipeline","level":1,"category":"process","expanded":false,"x":200,"y":350,"width":180,"height":70,"color":"#3498db","shape":"rounded_rectangle","details":["Multiple data sources","Real-time streaming"],"processes":["Source setup","Validation"],"considerations":["Privacy compliance"]}],"edges":[{"id":"edge1","from":"root","to":"phase1","label":"initiates","description":"System starts with data collection","color":"#7f8c8d","weight":2,"style":"solid"}]}
+Original prompt: "Design a data pipeline"
 
-        # Step 4: Validate and correct XML
-        print("4️⃣ Validating XML structure...")
-        final_xml = await self._validate_xml(xml_content)
+the correct response is:
 
-        print("✅ Enhanced mindmap generation completed!")
-        return final_xml
+<?xml version="1.0" encoding="UTF-8"?>
+<mindmap version="2.0" editable="true">
+    <metadata>
+        <title>Data Pipeline</title>
+        <description>End-to-end data pipeline</description>
+        <created_at>2025-01-01T12:00:00</created_at>
+        <layout_type>sequential</layout_type>
+        <domain>technology</domain>
+        <complexity>intermediate</complexity>
+        <total_nodes>2</total_nodes>
+        <max_depth>1</max_depth>
+        <generation_context>Generated from: Design a data pipeline</generation_context>
+    </metadata>
+    <nodes>
+        <node id="root" level="0" category="root" expanded="true">
+            <content>
+                <title>Data Pipeline</title>
+                <description>End-to-end data pipeline</description>
+            </content>
+            <position x="400" y="100" width="200" height="80"/>
+            <style color="#2c3e50" shape="rectangle" border="solid"/>
+            <details>
+                <item>Batch and streaming</item>
+            </details>
+            <processes>
+                <step>Collect</step>
+                <step>Store</step>
+            </processes>
+            <considerations>
+                <point>Cost</point>
+            </considerations>
+        </node>
+        <node id="phase1" level="1" category="process" expanded="false">
+            <content>
+                <title>Data Collection</title>
+                <description>Comprehensive data gathering pipeline</description>
+            </content>
+            <position x="200" y="350" width="180" height="70"/>
+            <style color="#3498db" shape="rounded_rectangle" border="solid"/>
+            <details>
+                <item>Multiple data sources</item>
+                <item>Real-time streaming</item>
+            </details>
+            <processes>
+                <step>Source setup</step>
+                <step>Validation</step>
+            </processes>
+            <considerations>
+                <point>Privacy compliance</point>
+            </considerations>
+        </node>
+    </nodes>
+    <edges>
+        <edge id="edge1" source="root" target="phase1">
+            <label>initiates</label>
+            <description>System starts with data collection</description>
+            <style color="#7f8c8d" weight="2" line_style="solid"/>
+        </edge>
+    </edges>
+</mindmap>
+
+Note that every field comes straight from the structured data: "from"/"to" become source/target, an edge's "style" becomes line_style, and text containing &, < or > must be escaped as &amp;, &lt; and &gt;.
+
+Requirements:
+- All node IDs must be unique
+- All coordinates must be integers
+- Colors must be valid hex codes
+- Include ALL nodes and edges from the structured data
+- Include all details, processes, and considerations for each node
+- XML must be valid and well-formed
+- Use current timestamp for created_at
+- Set editable="true" for interactive editing
+- Include comprehensive metadata
+
+Before answering, validate your XML against this checklist:
+1. Valid XML syntax with proper encoding
+2. All opening tags have matching closing tags
+3. All attributes are properly quoted and special characters are escaped
+4. Node IDs are unique across the document
+5. Edge source/target IDs reference existing nodes
+6. Coordinates are valid integers
+7. Colors are valid hex codes (6-digit format)
+8. All required elements are present (title, description, details, etc.)
+9. Proper nesting of detail items, process steps, and consideration points
+10. Metadata completeness
+If any check fails, fix it and then re-emit the corrected XML.
+
+Return ONLY the XML content, no other text.
+"""
 
-    async def _parse_concepts_detailed(self, prompt: str) -> Dict[str, Any]:
-        """Extract detailed concepts with deep domain analysis and flowchart structure"""
+VALIDATE_XML_SYSTEM_PROMPT = """Validate and fix the enhanced XML mindmap given by the user if needed.
+
+Check for:
+1. Valid XML syntax with proper encoding
+2. All opening tags have matching closing tags
+3. All attributes are properly quoted
+4. Node IDs are unique across the document
+5. Edge source/target IDs reference existing nodes
+6. Coordinates are valid integers
+7. Colors are valid hex codes (6-digit format)
+8. All required elements are present (title, description, details, etc.)
+9. Proper nesting of detail items, process steps, and consideration points
+10. Metadata completeness
+
+If there are errors, fix them systematically and return the corrected XML.
+If it's valid, return it as-is.
+Maintain the enhanced structure with all detailed information.
+
+Return ONLY the XML content, no other text or explanations.
+"""
 
-        parsing_prompt = f"""
-        You are an expert analyst creating a comprehensive mindmap for: "{prompt}"
+# Fixed framing of the per-request user messages; only the data between head and tail varies
+_XML_REQUEST_HEAD, _XML_REQUEST_TAIL = 'Structured data: {BODY}\nOriginal prompt: "'.split("{BODY}")
+_VALIDATION_REQUEST_HEAD, _VALIDATION_REQUEST_TAIL = (
+    "Validate and fix this enhanced XML mindmap if needed:\n\n{BODY}\n\nProblems found by automated checks:\n".split("{BODY}")
+)
 
-        FIRST, analyze the domain and core workflow:
-        1. Identify the domain (technology/business/education/science/healthcare/etc.)
-        2. Determine the main process flow or system architecture
-        3. Identify key decision points and branching logic
-        4. Map out sequential steps and parallel processes
 
-        Create a flowchart-style mindmap where each node contains rich information like a presentation slide.
+logger = logging.getLogger(__name__)
 
-        Return ONLY valid JSON - no extra text or explanations:
 
-        {{
-            "main_topic": "System/Process Name",
-            "topic_description": "Comprehensive overview with context and scope",
-            "mindmap_type": "flowchart",
-            "domain": "machine_learning",
-            "complexity_level": "intermediate",
-            "workflow_type": "sequential",
-            "concepts": [
-                {{
-                    "id": "root",
-                    "title": "System Overview",
-                    "description": "Complete system description with purpose and scope",
-                    "level": 0,
-                    "parent": null,
-                    "category": "system",
-                    "node_type": "start",
-                    "what": "What this system does",
-                    "why": "Business value and importance",
-                    "how": "High-level approach and methodology",
-                    "examples": ["Real example 1", "Use case 2"],
-                    "metrics": ["Success metric 1", "KPI 2"],
-                    "details": ["Technical requirement", "Key decision", "Success factor"],
-                    "processes": ["Phase 1: Planning", "Phase 2: Implementation"],
-                    "considerations": ["Major risk", "Best practice"],
-                    "tools_technologies": ["Tool 1", "Technology 2"],
-                    "stakeholders": ["Role 1", "Department 2"]
-                }},
-                {{
-                    "id": "phase1",
-                    "title": "Data Collection",
-                    "description": "Comprehensive data gathering pipeline",
-                    "level": 1,
-                    "parent": "root",
-                    "category": "process",
-                    "node_type": "process",
-                    "what": "Collect and validate data",
-                    "why": "Quality data enables accurate predictions",
-                    "how": "Automated ETL with validation",
-                    "examples": ["Transaction logs", "User events"],
-                    "metrics": ["Completeness: >95%", "Latency: <10min"],
-                    "details": ["Multiple data sources", "Real-time streaming", "Quality checks"],
-                    "processes": ["Source setup", "Validation", "Storage"],
-                    "considerations": ["Privacy compliance", "Data retention"],
-                    "tools_technologies": ["Apache Kafka", "Spark"],
-                    "stakeholders": ["Data Engineers", "Privacy Team"]
-                }}
-            ],
-            "relationships": [
-                {{"from": "root", "to": "phase1", "type": "initiates", "description": "System starts with data collection"}}
-            ]
-        }}
+def setup_logging(level: int = logging.WARNING) -> logging.handlers.QueueListener:
+    """Route log records through a queue so stdout writes happen off the event loop thread"""
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+    root = logging.getLogger()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+    listener.start()
+    return listener
+
+
+def _cached_system(prompt: str) -> List[Dict[str, Any]]:
+    """Wrap a static system prompt in a prompt-caching breakpoint.
 
-        Generate 6-8 main nodes with logical flow. Each node should contain detailed information.
-        Use node_type values: start, process, decision, outcome, checkpoint, end
-        Keep all text content under 100 characters per field to avoid JSON issues.
+    The API ignores breakpoints on prefixes below the model's minimum cacheable length, so the marker is
+    always sent; MindmapGenerator.token_usage shows whether each stage actually reads from the cache.
+    """
+    return [{"type": "text", "text": prompt, "cache_control": {"type": "ephemeral"}}]
+
+
+def _project(data: Any, schema: Any) -> Any:
+    """Keep only the fields named in schema; nested schemas apply to dicts and to each item of lists"""
+    if schema is None:
+        return data
+    if isinstance(data, list):
+        return [_project(item, schema) for item in data]
+    if isinstance(data, MindmapNode):
+        return data.to_dict(schema if isinstance(schema, set) else None)
+    if not isinstance(data, dict):
+        return data
+    if isinstance(schema, set):
+        return {key: value for key, value in data.items() if key in schema}
+    return {key: _project(data[key], sub_schema) for key, sub_schema in schema.items() if key in data}
+
+
+@functools.lru_cache(maxsize=2048)
+def _trunc30(title: str) -> str:
+    """Shorten a node title to 30 characters, sharing one string object per distinct title"""
+    return sys.intern(title) if len(title) <= 30 else title[:30]
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize a prompt so case, spacing and sentence punctuation don't change its cache key"""
+    prompt = _PUNCTUATION_RE.sub(" ", prompt.lower())
+    return " ".join(prompt.split())
+
+
+def _check_node(node: Any, node_ids: Set[str]) -> List[str]:
+    """Check a single <node> element, recording its id in node_ids"""
+    node_id = node.get("id")
+    if not node_id:
+        return ["Node without an id"]
+
+    problems = []
+    if node_id in node_ids:
+        problems.append(f"Duplicate node id '{node_id}'")
+    node_ids.add(node_id)
+
+    if node.find("content/title") is None:
+        problems.append(f"Node '{node_id}' has no title")
+
+    position = node.find("position")
+    if position is None:
+        problems.append(f"Node '{node_id}' has no position")
+    else:
+        for attr in ("x", "y", "width", "height"):
+            if not _INT_RE.fullmatch(position.get(attr, "")):
+                problems.append(f"Node '{node_id}' has non-integer {attr}")
+
+    style = node.find("style")
+    if style is not None and not _HEX_COLOR_RE.fullmatch(style.get("color", "")):
+        problems.append(f"Node '{node_id}' has invalid color '{style.get('color')}'")
+
+    return problems
+
+
+def _check_document(root: Any, node_ids: Set[str]) -> List[str]:
+    """Check document-level structure once every node id is known"""
+    if root.tag != "mindmap":
+        return [f"Root element is <{root.tag}>, expected <mindmap>"]
+
+    problems = []
+    if root.find("metadata/title") is None:
+        problems.append("Missing metadata title")
+    if not node_ids:
+        problems.append("No nodes found")
+
+    for edge in root.findall("edges/edge"):
+        for attr in ("source", "target"):
+            if edge.get(attr) not in node_ids:
+                problems.append(f"Edge '{edge.get('id')}' {attr} '{edge.get(attr)}' is not a node")
+
+    return problems
+
+
+@dataclass(slots=True)
+class MindmapNode:
+    """A laid-out mindmap node; converted to a dict only where it is serialized"""
+    id: str
+    title: str
+    description: str
+    level: int
+    x: int
+    y: int
+    width: int
+    height: int
+    color: str
+    shape: str
+    category: str
+    node_type: str
+    what: str
+    why: str
+    how: str
+    examples: Sequence[str]
+    metrics: Sequence[str]
+    details: Sequence[str]
+    processes: Sequence[str]
+    considerations: Sequence[str]
+    tools_technologies: Sequence[str]
+    stakeholders: Sequence[str]
+    expanded: bool
+
+    def to_dict(self, keys: Optional[Set[str]] = None) -> Dict[str, Any]:
+        """Return the node as a dict in field order, limited to keys when given"""
+        return {name: getattr(self, name) for name in _MINDMAP_NODE_FIELDS if keys is None or name in keys}
+
+
+_MINDMAP_NODE_FIELDS = tuple(field.name for field in fields(MindmapNode))
+
+
+class XMLStreamChecker:
+    """Incrementally parse streamed mindmap XML, checking each node as soon as it closes"""
+
+    def __init__(self):
+        self._parser = etree.XMLPullParser(events=("end",), tag="node", resolve_entities=False, no_network=True)
+        self._started = False
+        self._failed = False
+        self.node_ids: Set[str] = set()
+        self.problems: List[str] = []
+
+    def feed(self, text: str) -> None:
+        if self._failed:
+            return
+        if not self._started:
+            # Skip any markdown fence or preamble ahead of the document
+            start = text.find("<")
+            if start == -1:
+                return
+            text = text[start:]
+            self._started = True
+        try:
+            self._parser.feed(text)
+            self._read_nodes()
+        except etree.XMLSyntaxError:
+            self._failed = True
+
+    def _read_nodes(self) -> None:
+        for _, node in self._parser.read_events():
+            self.problems.extend(_check_node(node, self.node_ids))
+
+    def close(self) -> Optional[List[str]]:
+        """Return all problems found, or None if the stream could not be checked incrementally"""
+        if self._failed or not self._started:
+            return None
+        try:
+            root = self._parser.close()
+            self._read_nodes()
+        except etree.XMLSyntaxError:
+            return None
+        return self.problems + _check_document(root, self.node_ids)
+
+
+class StageCache:
+    """SQLite-backed store of compressed pipeline stage outputs with a TTL"""
+
+    def __init__(self, path: str, ttl: float = STAGE_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS stage_cache "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        return conn
+
+    def _get(self, key: str) -> Any:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value, created_at FROM stage_cache WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return orjson.loads(zlib.decompress(row[0]))
+
+    def _set(self, key: str, value: Any) -> None:
+        blob = zlib.compress(orjson.dumps(value))
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO stage_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, blob, time.time())
+            )
+
+    def _warm(self) -> None:
+        with closing(self._connect()) as conn:
+            # Persistent per database file; lets server workers read while another one writes
+            conn.execute("PRAGMA journal_mode=WAL")
+
+    async def warm(self) -> None:
+        """Open the database and create its table ahead of the first lookup"""
+        try:
+            await asyncio.to_thread(self._warm)
+        except sqlite3.Error as e:
+            logger.warning("⚠️ Stage cache warmup failed: %s", e)
+
+    async def get(self, key: str) -> Any:
+        """Return the cached value for key, or None if missing, expired or unreadable"""
+        try:
+            return await asyncio.to_thread(self._get, key)
+        except (sqlite3.Error, zlib.error, orjson.JSONDecodeError) as e:
+            logger.warning("⚠️ Stage cache read failed: %s", e)
+            return None
+
+    async def set(self, key: str, value: Any) -> None:
+        """Store value under key, ignoring storage errors"""
+        try:
+            await asyncio.to_thread(self._set, key, value)
+        except sqlite3.Error as e:
+            logger.warning("⚠️ Stage cache write failed: %s", e)
+
+
+def cached_stage(name: str):
+    """Cache a pipeline stage coroutine by stage name and arguments; None results are not stored"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args):
+            if self._stage_cache is None:
+                return await func(self, *args)
+
+            key = hashlib.sha256(orjson.dumps([name, *args], option=orjson.OPT_SORT_KEYS)).hexdigest()
+            cached = await self._stage_cache.get(key)
+            if cached is not None:
+                logger.info("⚡ Reusing cached %s stage output", name)
+                return cached
+
+            result = await func(self, *args)
+            if result is not None:
+                await self._stage_cache.set(key, result)
+            return result
+        return wrapper
+    return decorator
+
+
+class MindmapGenerator:
+    """Enhanced mindmap generator with detailed node information using Claude for each processing step"""
+
+    def __init__(self, anthropic_api_key: str, stage_cache_path: Optional[str] = STAGE_CACHE_PATH,
+                 batch_window: float = PARSE_BATCH_WINDOW, http_client: Optional[httpx.AsyncClient] = None):
+        # A shared http_client stays owned by the caller; otherwise this generator opens and closes its own pool
+        self._owns_http_client = http_client is None
+        if http_client is None:
+            http_client = httpx.AsyncClient(http2=True, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        # _call retries rate limits, overloads and dropped connections itself; SDK retries would stack on top
+        self.client = AsyncAnthropic(api_key=anthropic_api_key, http_client=http_client, max_retries=0)
+        self._exact_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._stage_cache = StageCache(stage_cache_path) if stage_cache_path else None
+        self._sem = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self._batch_window = batch_window
+        self._batch_queue: "asyncio.Queue[tuple]" = asyncio.Queue()
+        self._batch_drainer: Optional[asyncio.Task] = None
+        self._batch_tasks: Set[asyncio.Task] = set()
+        self.token_usage: Dict[str, Dict[str, int]] = {}
+
+    async def warmup(self):
+        """Prepare local resources so the first request doesn't pay for their setup"""
+        if self._stage_cache is not None:
+            await self._stage_cache.warm()
+
+    async def aclose(self):
+        """Stop background batching and close the HTTP connection pool if this generator owns it"""
+        if self._batch_drainer is not None:
+            self._batch_drainer.cancel()
+        # Prompts still queued for a batch would otherwise wait on their futures forever
+        while not self._batch_queue.empty():
+            _, future = self._batch_queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Mindmap generator closed before the batched parse ran"))
+        if self._owns_http_client:
+            await self.client.close()
+
+    async def _call(self, stage: str, on_text: Optional[Callable[[str], None]] = None, **kwargs) -> Any:
+        """Create a message under the shared concurrency cap, backing off while rate limited.
+
+        When on_text is given the response is streamed and each text delta is passed to it as it arrives.
+        Output token usage is recorded under stage. The concurrency slot is held per attempt only,
+        so a request backing off doesn't starve the others.
         """
+        for attempt in range(RATE_LIMIT_RETRIES):
+            try:
+                async with self._sem:
+                    if on_text is None:
+                        response = await self.client.messages.create(**kwargs)
+                    else:
+                        async with self.client.messages.stream(**kwargs) as stream:
+                            async for text in stream.text_stream:
+                                on_text(text)
+                            response = await stream.get_final_message()
+                self._record_usage(stage, response, kwargs["max_tokens"])
+                return response
+            except (RateLimitError, InternalServerError, APIConnectionError) as e:
+                # A timed out request already waited HTTP_TIMEOUT, so it is not worth repeating
+                if attempt == RATE_LIMIT_RETRIES - 1 or isinstance(e, APITimeoutError):
+                    raise
+                headers = e.response.headers if isinstance(e, APIStatusError) else {}
+                try:
+                    delay = float(headers.get("retry-after", 2 ** attempt))
+                except ValueError:
+                    delay = 2 ** attempt
+                logger.warning("⏳ %s, retrying in %.1fs", type(e).__name__, delay)
+                await asyncio.sleep(delay)
+
+    def _record_usage(self, stage: str, response: Any, max_tokens: int):
+        """Track tokens per stage so the max_tokens caps can be tuned and prompt cache hits confirmed from real traffic"""
+        output_tokens = response.usage.output_tokens
+        usage = self.token_usage.setdefault(
+            stage, {"calls": 0, "output_tokens": 0, "max_output_tokens": 0, "cache_read_input_tokens": 0}
+        )
+        usage["calls"] += 1
+        usage["output_tokens"] += output_tokens
+        usage["max_output_tokens"] = max(usage["max_output_tokens"], output_tokens)
+        usage["cache_read_input_tokens"] += getattr(response.usage, "cache_read_input_tokens", None) or 0
+
+        if response.stop_reason == "max_tokens":
+            logger.warning("⚠️ %s response hit the %d token cap and was truncated", stage, max_tokens)
 
-        max_retries = 3
+    async def generate_mindmap(self, prompt: str) -> str:
+        """Main method to generate detailed mindmap XML from prompt"""
+        async for event in self.astream(prompt, preview=False):
+            if event["event"] == "result":
+                return event["xml_content"]
+
+    async def astream(self, prompt: str, preview: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """Generate a mindmap, yielding events as the stages finish.
+
+        With preview set, a locally rendered draft is yielded as {"event": "preview", "xml_content": ...}
+        once the concepts are laid out; the final XML always ends the stream as {"event": "result", ...}.
+        The result's "fallback" flag is set when a stage had to use a local placeholder instead of Claude.
+        """
+        cache_key = hashlib.sha256(normalize_prompt(prompt).encode()).hexdigest()
+        cached_xml = self._exact_cache.get(cache_key)
+        if cached_xml is None and self._stage_cache is not None:
+            # Finished mindmaps are also kept on disk so repeat prompts survive restarts
+            cached_xml = await self._stage_cache.get(f"mindmap:{cache_key}")
+        if cached_xml is not None:
+            self._remember(cache_key, cached_xml)
+            logger.info("⚡ Returning cached mindmap for: '%s...'", prompt[:50])
+            yield {"event": "result", "xml_content": cached_xml, "fallback": False}
+            return
+
+        logger.info("🧠 Starting enhanced mindmap generation for: '%s...'", prompt[:50])
+
+        # Step 1: Parse prompt into detailed concepts
+        logger.info("1️⃣ Parsing concepts and relationships with detailed analysis...")
+        parsed_data, parse_fallback = await self._parse_concepts_detailed(prompt)
+
+        # Step 2: Lay the concepts out locally as a detailed knowledge structure
+        structured_data = self._structure_knowledge_detailed(parsed_data)
+        if preview:
+            # The draft is optional, so a rendering failure (e.g. control characters in model text) is skipped
+            try:
+                preview_xml = render_mindmap_xml(structured_data, prompt)
+            except (TypeError, ValueError) as e:
+                logger.warning("⚠️ Could not render preview, continuing without it: %s", e)
+            else:
+                yield {"event": "preview", "xml_content": preview_xml}
+
+        # Step 3: Generate comprehensive, self-validated XML
+        logger.info("2️⃣ Generating and validating detailed XML mindmap...")
+        final_xml, xml_fallback = await self._generate_detailed_xml(structured_data, prompt)
+
+        fallback = parse_fallback or xml_fallback
+        if fallback:
+            # A placeholder from an outage must not be replayed for the prompt once the API recovers
+            logger.warning("⚠️ Mindmap built from fallback output, not caching it")
+        else:
+            self._remember(cache_key, final_xml)
+            if self._stage_cache is not None:
+                await self._stage_cache.set(f"mindmap:{cache_key}", final_xml)
+
+        logger.info("✅ Enhanced mindmap generation completed!")
+        yield {"event": "result", "xml_content": final_xml, "fallback": fallback}
+
+    def _remember(self, cache_key: str, xml_content: str):
+        """Store a finished mindmap in the in-memory LRU, evicting the least recently used entry"""
+        self._exact_cache[cache_key] = xml_content
+        self._exact_cache.move_to_end(cache_key)
+        if len(self._exact_cache) > RESPONSE_CACHE_SIZE:
+            self._exact_cache.popitem(last=False)
+
+    async def _parse_concepts_detailed(self, prompt: str) -> Tuple[Dict[str, Any], bool]:
+        """Extract detailed concepts with deep domain analysis and flowchart structure.
+
+        Returns the concepts and whether the local fallback structure was used instead of Claude's.
+        """
+        parsed_data = await self._request_concepts(prompt)
+        if parsed_data is not None:
+            return parsed_data, False
+
+        logger.info("🔄 Using intelligent fallback structure")
+        return self._create_intelligent_fallback(prompt), True
+
+    @cached_stage("parse_concepts")
+    async def _request_concepts(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """Ask Claude for detailed concepts; None if every attempt fails"""
+        if self._batch_window > 0:
+            parsed_data = await self._request_concepts_batched(prompt)
+            if parsed_data is not None:
+                return parsed_data
+
+        parsing_request = f"Create a comprehensive mindmap for: \"{prompt}\""
+
+        # Malformed JSON is repaired locally, so retries only cover API errors and unusable data
+        max_retries = 2
         for attempt in range(max_retries):
             try:
-                response = await self.client.messages.create(
+                response = await self._call(
+                    "parse",
                     model=PARSE_MODEL,
-                    max_tokens=4000,
-                    messages=[{"role": "user", "content": parsing_prompt}]
+                    max_tokens=PARSE_MAX_TOKENS,
+                    stop_sequences=JSON_STOP_SEQUENCES,
+                    system=_cached_system(PARSE_SYSTEM_PROMPT),
+                    messages=[{"role": "user", "content": parsing_request}]
                 )
 
                 content = response.content[0].text.strip()
                 content = self._clean_json_response(content)
-                parsed_data = json.loads(content)
-
-                if self._validate_detailed_parsed_data(parsed_data):
-                    print(f"✅ Generated {len(parsed_data.get('concepts', []))} detailed concepts")
+                parsed_data = self._concepts_from_parsed(self._load_json(content))
+                if parsed_data is not None:
                     return parsed_data
-                else:
-                    print(f"⚠️ Invalid detailed data structure, attempt {attempt + 1}")
 
-            except json.JSONDecodeError as e:
-                print(f"⚠️ JSON parsing failed, attempt {attempt + 1}: {e}")
+                logger.warning("⚠️ Invalid detailed data structure, attempt %d", attempt + 1)
+
+            except orjson.JSONDecodeError as e:
+                logger.warning("⚠️ JSON parsing failed, attempt %d: %s", attempt + 1, e)
                 if attempt == max_retries - 1:
-                    print("📝 Raw response:", content[:300] + "...")
+                    logger.debug("📝 Raw response: %s...", content[:300])
 
             except Exception as e:
-                print(f"⚠️ API error, attempt {attempt + 1}: {e}")
+                logger.warning("⚠️ API error, attempt %d: %s", attempt + 1, e)
+
+        return None
+
+    async def _request_concepts_batched(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """Queue a prompt for the next batched parse call; None means request it individually"""
+        future = asyncio.get_running_loop().create_future()
+        await self._batch_queue.put((prompt, future))
+        if self._batch_drainer is None or self._batch_drainer.done():
+            self._batch_drainer = asyncio.create_task(self._drain_batches())
+        return await future
+
+    async def _drain_batches(self):
+        """Collect prompts arriving within the batch window and dispatch them together"""
+        while not self._batch_queue.empty():
+            await asyncio.sleep(self._batch_window)
+            batch = []
+            while not self._batch_queue.empty() and len(batch) < PARSE_BATCH_SIZE:
+                batch.append(self._batch_queue.get_nowait())
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch: List[tuple]):
+        """Parse several prompts with one Claude call and resolve each caller's future"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+
+        # A lone prompt gains nothing from the batch format, so it is requested individually
+        if len(batch) > 1:
+            topics = "\n".join(f"{i + 1}. \"{prompt}\"" for i, (prompt, _) in enumerate(batch))
+            batch_request = (
+                f"Create a comprehensive mindmap for each of these {len(batch)} topics:\n{topics}\n\n"
+                "Return ONLY a JSON array containing one mindmap object per topic, in the same order, "
+                "and end it with ] and nothing else."
+            )
+            try:
+                response = await self._call(
+                    "parse_batch",
+                    model=PARSE_MODEL,
+                    max_tokens=min(PARSE_MAX_TOKENS * len(batch), 20000),
+                    stop_sequences=JSON_STOP_SEQUENCES,
+                    system=_cached_system(PARSE_SYSTEM_PROMPT),
+                    messages=[{"role": "user", "content": batch_request}]
+                )
+                items = self._load_json(self._clean_json_response(response.content[0].text.strip(), opener='['))
+                if isinstance(items, list):
+                    for i, item in enumerate(items[:len(batch)]):
+                        results[i] = self._concepts_from_parsed(item)
+                logger.info("📦 Batched parse resolved %d/%d prompts", sum(r is not None for r in results), len(batch))
+            except Exception as e:
+                logger.warning("⚠️ Batched parse failed, requesting individually: %s", e)
 
-        print("🔄 Using intelligent fallback structure")
-        return self._create_intelligent_fallback(prompt)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
 
-    async def _structure_knowledge_detailed(self, parsed_data: Dict, original_prompt: str) -> Dict[str, Any]:
-        """Organize detailed concepts into a structured hierarchy with enhanced layout"""
+    def _concepts_from_parsed(self, parsed_data: Any) -> Optional[Dict[str, Any]]:
+        """Return one parsed mindmap object if its concepts are usable, otherwise None"""
+        if not self._validate_detailed_parsed_data(parsed_data):
+            return None
 
-        structuring_prompt = f"""
-        Create a comprehensive visual layout for this detailed mindmap data: {json.dumps(parsed_data, indent=2)}
+        logger.info("✅ Generated %d detailed concepts", len(parsed_data.get('concepts', [])))
+        return parsed_data
 
-        Return ONLY valid JSON in this exact format:
+    async def _generate_detailed_xml(self, structured_data: Dict, original_prompt: str) -> Tuple[str, bool]:
+        """Generate comprehensive XML mindmap from detailed structured data and self-validate it.
 
-        {{
-            "title": "{parsed_data.get('main_topic', 'Mindmap')}",
-            "description": "{parsed_data.get('topic_description', 'Comprehensive mindmap')}",
-            "layout_type": "hierarchical",
-            "domain": "{parsed_data.get('domain', 'general')}",
-            "complexity": "{parsed_data.get('complexity_level', 'intermediate')}",
-            "metadata": {{
-                "total_nodes": 0,
-                "max_depth": 0,
-                "creation_context": "Generated from detailed analysis"
-            }},
-            "nodes": [
-                {{
-                    "id": "root",
-                    "title": "Central Topic",
-                    "description": "Comprehensive description",
-                    "level": 0,
-                    "x": 400,
-                    "y": 200,
-                    "width": 200,
-                    "height": 80,
-                    "color": "#2c3e50",
-                    "shape": "rectangle",
-                    "category": "core",
-                    "details": ["detail1", "detail2"],
-                    "processes": ["process1"],
-                    "considerations": ["consideration1"],
-                    "expanded": true
-                }},
-                {{
-                    "id": "node1",
-                    "title": "Major Component",
-                    "description": "Detailed explanation",
-                    "level": 1,
-                    "x": 200,
-                    "y": 350,
-                    "width": 180,
-                    "height": 70,
-                    "color": "#3498db",
-                    "shape": "rounded_rectangle",
-                    "category": "process",
-                    "details": ["detail1", "detail2"],
-                    "processes": ["process1"],
-                    "considerations": ["consideration1"],
-                    "expanded": false
-                }}
-            ],
-            "edges": [
-                {{
-                    "id": "edge1",
-                    "from": "root",
-                    "to": "node1",
-                    "label": "contains",
-                    "description": "Relationship description",
-                    "color": "#7f8c8d",
-                    "weight": 2,
-                    "style": "solid"
-                }}
-            ]
-        }}
-
-        Enhanced Layout rules:
-        - Root node at center (400, 200) with larger size (200x80)
-        - Level 1 nodes distributed in semicircle below root (y=350-400)
-        - Level 2 nodes positioned below their parents (y=500-550)
-        - Space nodes adequately (180-220px apart horizontally)
-        - Use semantic colors:
-          * Core concept: "#2c3e50" (dark blue-gray)
-          * Process: "#3498db" (blue)
-          * Component: "#27ae60" (green)
-          * Method: "#e74c3c" (red)
-          * Tool: "#f39c12" (orange)
-          * Outcome: "#9b59b6" (purple)
-        - Vary node sizes based on importance and content amount
-        - All nodes start as collapsed (expanded: false) except root
-        - Include all details, processes, and considerations from parsed data
-        - No extra text, just JSON
+        Returns the XML and whether the local placeholder document was used because generation failed.
         """
+        # Send only what the XML template renders, so unchanged layouts share a cache entry
+        handoff_data = _project(structured_data, _XML_HANDOFF_SCHEMA)
+        result = await self._request_xml(handoff_data, original_prompt, GENERATE_XML_MODEL)
+        if result is None:
+            return await self._validate_xml(self._create_detailed_fallback_xml(structured_data, original_prompt)), True
+
+        xml_content = await self._validate_xml(result["xml"], result["problems"])
+        if not result["problems"] or not self._check_xml(xml_content):
+            return xml_content, False
+
+        return await self._try_fallback_to_sonnet(handoff_data, original_prompt, xml_content), False
+
+    async def _try_fallback_to_sonnet(self, handoff_data: Dict, original_prompt: str, xml_content: str) -> str:
+        """Regenerate XML with the stronger model when the fast model's output could not be corrected"""
+        logger.warning("⚠️ XML from %s still invalid after correction, regenerating with %s", GENERATE_XML_MODEL, XML_FALLBACK_MODEL)
+        result = await self._request_xml(handoff_data, original_prompt, XML_FALLBACK_MODEL)
+        if result is None:
+            return xml_content
 
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                response = await self.client.messages.create(
-                    model=STRUCTURE_MODEL,
-                    max_tokens=4000,
-                    messages=[{"role": "user", "content": structuring_prompt}]
-                )
+        return await self._validate_xml(result["xml"], result["problems"])
 
-                content = response.content[0].text.strip()
-                content = self._clean_json_response(content)
-                structured_data = json.loads(content)
-
-                if self._validate_detailed_structured_data(structured_data):
-                    # Update metadata
-                    structured_data["metadata"]["total_nodes"] = len(structured_data.get("nodes", []))
-                    structured_data["metadata"]["max_depth"] = max([node.get("level", 0) for node in structured_data.get("nodes", [])], default=0)
-                    return structured_data
-                else:
-                    print(f"⚠️ Invalid detailed structure format, attempt {attempt + 1}")
-
-            except json.JSONDecodeError as e:
-                print(f"⚠️ JSON parsing failed, attempt {attempt + 1}: {e}")
-                if attempt == max_retries - 1:
-                    print("📝 Raw response:", content[:300] + "...")
+    @cached_stage("generate_checked_xml")
+    async def _request_xml(self, structured_data: Dict, original_prompt: str, model: str) -> Optional[Dict[str, Any]]:
+        """Stream self-validated XML from Claude, checking nodes as they arrive.
 
-            except Exception as e:
-                print(f"⚠️ API error, attempt {attempt + 1}: {e}")
-
-        print("🔄 Using fallback detailed structure")
-        return self._create_detailed_fallback_structure(parsed_data)
-
-    async def _generate_detailed_xml(self, structured_data: Dict, original_prompt: str) -> str:
-        """Generate comprehensive XML mindmap from detailed structured data"""
-
-        xml_prompt = f"""
-        Generate a comprehensive XML mindmap from this detailed structured data:
-
-        Structured data: {json.dumps(structured_data, indent=2)}
-        Original prompt: "{original_prompt}"
-
-        Create valid XML with this enhanced structure:
-
-        <?xml version="1.0" encoding="UTF-8"?>
-        <mindmap version="2.0" editable="true">
-            <metadata>
-                <title>{{title}}</title>
-                <description>{{description}}</description>
-                <created_at>{{current_timestamp}}</created_at>
-                <layout_type>{{layout_type}}</layout_type>
-                <domain>{{domain}}</domain>
-                <complexity>{{complexity_level}}</complexity>
-                <total_nodes>{{node_count}}</total_nodes>
-                <max_depth>{{max_depth}}</max_depth>
-                <generation_context>Generated from: {{original_prompt}}</generation_context>
-            </metadata>
-            <nodes>
-                <node id="{{unique_id}}" level="{{level}}" category="{{category}}" expanded="{{true/false}}">
-                    <content>
-                        <title>{{node_title}}</title>
-                        <description>{{detailed_description}}</description>
-                    </content>
-                    <position x="{{x_coord}}" y="{{y_coord}}" width="{{width}}" height="{{height}}"/>
-                    <style color="{{hex_color}}" shape="{{shape}}" border="{{border_style}}"/>
-                    <details>
-                        <item>{{detail_1}}</item>
-                        <item>{{detail_2}}</item>
-                    </details>
-                    <processes>
-                        <step>{{process_1}}</step>
-                        <step>{{process_2}}</step>
-                    </processes>
-                    <considerations>
-                        <point>{{consideration_1}}</point>
-                        <point>{{consideration_2}}</point>
-                    </considerations>
-                </node>
-            </nodes>
-            <edges>
-                <edge id="{{edge_id}}" source="{{source_id}}" target="{{target_id}}">
-                    <label>{{relationship_label}}</label>
-                    <description>{{relationship_description}}</description>
-                    <style color="{{hex_color}}" weight="{{thickness}}" line_style="{{solid/dashed}}"/>
-                </edge>
-            </edges>
-        </mindmap>
-
-        Requirements:
-        - All node IDs must be unique
-        - All coordinates must be integers
-        - Colors must be valid hex codes
-        - Include ALL nodes and edges from the structured data
-        - Include all details, processes, and considerations for each node
-        - XML must be valid and well-formed
-        - Use current timestamp for created_at
-        - Set editable="true" for interactive editing
-        - Include comprehensive metadata
-
-        Return ONLY the XML content, no other text.
+        Returns the XML together with the problems found locally, or None on API failure.
         """
 
+        xml_request = "".join((
+            _XML_REQUEST_HEAD, orjson.dumps(structured_data).decode(), _XML_REQUEST_TAIL, original_prompt, '"'
+        ))
+
+        checker = XMLStreamChecker()
         try:
-            response = await self.client.messages.create(
-                model=GENERATE_XML_MODEL,
-                max_tokens=6000,
-                messages=[{"role": "user", "content": xml_prompt}]
+            response = await self._call(
+                "generate_xml",
+                on_text=checker.feed,
+                model=model,
+                max_tokens=GENERATE_XML_MAX_TOKENS,
+                stop_sequences=XML_STOP_SEQUENCES,
+                system=_cached_system(GENERATE_XML_SYSTEM_PROMPT),
+                messages=[{"role": "user", "content": xml_request}]
             )
 
             xml_content = response.content[0].text.strip()
+            # The matched stop sequence is not part of the returned text
+            if response.stop_reason == "stop_sequence":
+                xml_content += response.stop_sequence
+                checker.feed(response.stop_sequence)
 
             # Clean up XML if it has markdown formatting
             if xml_content.startswith('```xml'):
                 xml_content = xml_content[6:]
             if xml_content.endswith('```'):
                 xml_content = xml_content[:-3]
+            xml_content = xml_content.strip()
 
-            return xml_content.strip()
+            problems = checker.close()
+            if problems is None:
+                problems = self._check_xml(xml_content)
+            return {"xml": xml_content, "problems": problems}
 
         except Exception as e:
-            print(f"❌ Error in detailed XML generation: {e}")
-            return self._create_detailed_fallback_xml(structured_data, original_prompt)
-
-    async def _validate_xml(self, xml_content: str) -> str:
-        """Validate and correct enhanced XML if needed"""
-
-        validation_prompt = f"""
-        Validate and fix this enhanced XML mindmap if needed:
-
-        {xml_content}
-
-        Check for:
-        1. Valid XML syntax with proper encoding
-        2. All opening tags have matching closing tags
-        3. All attributes are properly quoted
-        4. Node IDs are unique across the document
-        5. Edge source/target IDs reference existing nodes
-        6. Coordinates are valid integers
-        7. Colors are valid hex codes (6-digit format)
-        8. All required elements are present (title, description, details, etc.)
-        9. Proper nesting of detail items, process steps, and consideration points
-        10. Metadata completeness
-
-        If there are errors, fix them systematically and return the corrected XML.
-        If it's valid, return it as-is.
-        Maintain the enhanced structure with all detailed information.
-
-        Return ONLY the XML content, no other text or explanations.
-        """
+            logger.error("❌ Error in detailed XML generation: %s", e)
+            return None
+
+    async def _validate_xml(self, xml_content: str, problems: Optional[List[str]] = None) -> str:
+        """Validate XML locally and only ask Claude to correct it when checks fail"""
+        if problems is None:
+            problems = self._check_xml(xml_content)
+        if not problems:
+            return xml_content
+
+        logger.warning("⚠️ Local XML validation found %d problem(s), requesting correction: %s", len(problems), problems[0])
+        validated_xml = await self._request_validation(xml_content, problems)
+        return validated_xml if validated_xml is not None else xml_content
+
+    async def correct_xml(self, xml_content: str) -> Optional[str]:
+        """Ask Claude to fix user-supplied mindmap XML with the validation stage; None if the call fails"""
+        problems = self._check_xml(xml_content)
+        if not problems:
+            return xml_content
+        return await self._request_validation(xml_content, problems)
+
+    @cached_stage("validate_xml")
+    async def _request_validation(self, xml_content: str, problems: List[str]) -> Optional[str]:
+        """Ask Claude to validate and fix XML; None on API failure"""
+
+        validation_request = "".join((
+            _VALIDATION_REQUEST_HEAD, xml_content, _VALIDATION_REQUEST_TAIL,
+            "\n".join(f"- {problem}" for problem in problems)
+        ))
 
         try:
-            response = await self.client.messages.create(
+            response = await self._call(
+                "validate_xml",
                 model=VALIDATE_XML_MODEL,
-                max_tokens=6000,
-                messages=[{"role": "user", "content": validation_prompt}]
+                max_tokens=VALIDATE_XML_MAX_TOKENS,
+                stop_sequences=XML_STOP_SEQUENCES,
+                system=_cached_system(VALIDATE_XML_SYSTEM_PROMPT),
+                messages=[{"role": "user", "content": validation_request}]
             )
 
             validated_xml = response.content[0].text.strip()
+            if response.stop_reason == "stop_sequence":
+                validated_xml += response.stop_sequence
 
             # Clean up XML if it has markdown formatting
             if validated_xml.startswith('```xml'):
@@ -405,77 +1069,82 @@ class MindmapGenerator:
             return validated_xml.strip()
 
         except Exception as e:
-            print(f"❌ Error in validation: {e}")
-            return xml_content
+            logger.error("❌ Error in validation: %s", e)
+            return None
 
-    def _clean_json_response(self, content: str) -> str:
-        """Clean up Claude's response to extract valid JSON"""
-        # Remove markdown code blocks
+    def _check_xml(self, xml_content: str) -> List[str]:
+        """Run local structural checks on mindmap XML and return the problems found"""
+        try:
+            root = etree.fromstring(xml_content.encode("utf-8"), _XML_PARSER)
+        except etree.XMLSyntaxError as e:
+            return [f"XML syntax error: {e}"]
+
+        node_ids: Set[str] = set()
+        problems = []
+        for node in root.findall("nodes/node"):
+            problems.extend(_check_node(node, node_ids))
+        return problems + _check_document(root, node_ids)
+
+    def _clean_json_response(self, content: str, opener: str = '{') -> str:
+        """Clean up Claude's response to extract valid JSON; opener is '[' for batched array responses"""
+        # Remove markdown code blocks; the closing fence is missing when generation hit the stop sequence
         if '```json' in content:
             start = content.find('```json') + 7
             end = content.find('```', start)
-            content = content[start:end]
+            content = content[start:end if end != -1 else len(content)]
         elif '```' in content:
             start = content.find('```') + 3
             end = content.rfind('```')
-            content = content[start:end]
+            content = content[start:end if end >= start else len(content)]
 
-        # Find JSON object boundaries
-        start_idx = content.find('{')
-        end_idx = content.rfind('}') + 1
+        # Find JSON object (or, for batched responses, array) boundaries
+        start_idx = content.find(opener)
+        end_idx = content.rfind('}' if opener == '{' else ']') + 1
 
         if start_idx != -1 and end_idx > start_idx:
             content = content[start_idx:end_idx]
 
         # Clean up common JSON issues
-        content = content.replace('\n', ' ')
-        content = content.replace('\t', ' ')
-        import re
-        content = re.sub(r',(\s*[}\]])', r'\1', content)
+        content = _WS_RE.sub(' ', content)
+        content = _TRAILING_COMMA_RE.sub(r'\1', content)
 
         return content.strip()
 
+    def _load_json(self, content: str) -> Any:
+        """Parse JSON, repairing minor syntax errors locally instead of re-asking Claude"""
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError as e:
+            repaired = json_repair.loads(content)
+            # json_repair returns an empty string when nothing is salvageable
+            if not isinstance(repaired, (dict, list)):
+                raise e
+            logger.info("🔧 Repaired malformed JSON response locally")
+            return repaired
+
     def _validate_detailed_parsed_data(self, data: Dict) -> bool:
         """Validate detailed parsed data structure"""
-        required_keys = ["main_topic", "topic_description", "mindmap_type", "concepts", "relationships"]
-        if not all(key in data for key in required_keys):
-            return False
-
-        if not isinstance(data["concepts"], list) or len(data["concepts"]) == 0:
+        try:
+            _VALIDATE_PARSED(data)
+        except fastjsonschema.JsonSchemaException:
             return False
-
-        # Check first concept has required detailed fields
-        if data["concepts"]:
-            concept = data["concepts"][0]
-            required_concept_keys = ["id", "title", "description", "level", "what", "why", "how", "examples", "metrics"]
-            if not all(key in concept for key in required_concept_keys):
-                return False
-
         return True
 
     def _create_intelligent_fallback(self, prompt: str) -> Dict[str, Any]:
         """Create intelligent domain-specific fallback based on prompt analysis"""
 
-        # Analyze prompt for domain hints
-        prompt_lower = prompt.lower()
-        domain = "general"
+        # Analyze prompt for domain hints using its words and adjacent word pairs
+        words = prompt.split()
+        tokens = normalize_prompt(prompt).split()
+        token_set = set(tokens)
+        token_set.update(" ".join(pair) for pair in zip(tokens, tokens[1:]))
+        domain = next((name for name, keywords in _DOMAIN_KEYWORDS.items() if token_set & keywords), "general")
         workflow_type = "sequential"
 
-        if any(word in prompt_lower for word in ["machine learning", "ml", "ai", "model", "algorithm", "data"]):
-            domain = "machine_learning"
-        elif any(word in prompt_lower for word in ["architecture", "system", "software", "api", "database"]):
-            domain = "software_architecture"
-        elif any(word in prompt_lower for word in ["business", "strategy", "marketing", "sales", "revenue"]):
-            domain = "business_strategy"
-        elif any(word in prompt_lower for word in ["learn", "education", "course", "study", "training"]):
-            domain = "education"
-
         # Extract key terms
-        words = prompt.split()
-        stop_words = {'a', 'an', 'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'from', 'about', 'how', 'what', 'when', 'where', 'why', 'create', 'make', 'generate', 'mindmap', 'map', 'system', 'design'}
-        key_words = [w for w in words if w.lower() not in stop_words and len(w) > 3][:8]
+        key_words = [w for w in words if len(w) > 3 and w.lower() not in _STOP_WORDS][:8]
 
-        main_topic = ' '.join(prompt.split()[0:4]).title()
+        main_topic = ' '.join(words[0:4]).title()
 
         # Create domain-specific root concept
         concepts = [{
@@ -513,35 +1182,28 @@ class MindmapGenerator:
         relationships = []
 
         # Generate domain-specific process flow
-        if domain == "machine_learning":
-            process_flow = ["Data Collection", "Feature Engineering", "Model Training", "Validation", "Deployment", "Monitoring"]
-        elif domain == "software_architecture":
-            process_flow = ["Requirements Analysis", "System Design", "Implementation", "Testing", "Deployment", "Maintenance"]
-        elif domain == "business_strategy":
-            process_flow = ["Market Analysis", "Strategy Planning", "Resource Allocation", "Execution", "Performance Tracking"]
-        else:
-            process_flow = key_words[:6] if len(key_words) >= 6 else ["Planning", "Design", "Implementation", "Testing", "Deployment"]
+        process_flow = _PROCESS_FLOWS.get(domain) or (key_words[:6] if len(key_words) >= 6 else _DEFAULT_PROCESS_FLOW)
+        topic_lower = main_topic.lower()
 
         # Create detailed process nodes
         for i, process in enumerate(process_flow):
             concept_id = f"process_{i+1}"
+            step = process.lower()
             concepts.append({
+                **_PROCESS_CONCEPT_SKELETON,
                 "id": concept_id,
                 "title": process,
-                "description": f"Comprehensive {process.lower()} stage with detailed implementation",
-                "level": 1,
-                "parent": "root",
-                "category": "process",
+                "description": f"Comprehensive {step} stage with detailed implementation",
                 "node_type": "process" if i < len(process_flow)-1 else "outcome",
-                "what": f"Execute {process.lower()} with best practices",
-                "why": f"Critical step for successful {main_topic.lower()}",
-                "how": f"Systematic approach to {process.lower()}",
+                "what": f"Execute {step} with best practices",
+                "why": f"Critical step for successful {topic_lower}",
+                "how": f"Systematic approach to {step}",
                 "examples": [f"Example method for {process}", f"Tool/technique for {process}"],
-                "metrics": [f"{process} completion: 100%", f"Quality score: >85%", f"Timeline adherence: >90%"],
+                "metrics": [f"{process} completion: 100%", "Quality score: >85%", "Timeline adherence: >90%"],
                 "details": [
-                    f"Key deliverables for {process.lower()}",
-                    f"Quality criteria and acceptance tests",
-                    f"Dependencies and prerequisites"
+                    f"Key deliverables for {step}",
+                    "Quality criteria and acceptance tests",
+                    "Dependencies and prerequisites"
                 ],
                 "processes": [
                     f"Step 1: {process} planning and preparation",
@@ -549,8 +1211,8 @@ class MindmapGenerator:
                     f"Step 3: {process} validation and review"
                 ],
                 "considerations": [
-                    f"Common challenges in {process.lower()}",
-                    f"Best practices for {process.lower()}"
+                    f"Common challenges in {step}",
+                    f"Best practices for {step}"
                 ],
                 "tools_technologies": self._get_domain_tools(domain),
                 "stakeholders": self._get_domain_stakeholders(domain)
@@ -576,41 +1238,11 @@ class MindmapGenerator:
 
     def _get_domain_tools(self, domain: str) -> List[str]:
         """Get relevant tools for domain"""
-        tools_map = {
-            "machine_learning": ["Python", "TensorFlow", "scikit-learn", "MLflow"],
-            "software_architecture": ["Docker", "Kubernetes", "AWS/Azure", "MongoDB"],
-            "business_strategy": ["Excel", "Tableau", "Salesforce", "HubSpot"],
-            "education": ["LMS Platform", "Assessment Tools", "Video Conferencing", "Analytics"]
-        }
-        return tools_map.get(domain, ["Generic Tool 1", "Platform 2", "Framework 3"])
+        return list(_DOMAIN_TOOLS.get(domain, _DEFAULT_TOOLS))
 
     def _get_domain_stakeholders(self, domain: str) -> List[str]:
         """Get relevant stakeholders for domain"""
-        stakeholders_map = {
-            "machine_learning": ["Data Scientists", "ML Engineers", "Product Managers"],
-            "software_architecture": ["Software Architects", "DevOps Engineers", "QA Team"],
-            "business_strategy": ["Business Analysts", "Executive Team", "Marketing"],
-            "education": ["Instructors", "Students", "Academic Administration"]
-        }
-        return stakeholders_map.get(domain, ["Project Manager", "Technical Team", "Stakeholders"])
-
-    def _validate_detailed_structured_data(self, data: Dict) -> bool:
-        """Validate detailed structured data"""
-        required_keys = ["title", "description", "layout_type", "nodes", "edges"]
-        if not all(key in data for key in required_keys):
-            return False
-
-        if not isinstance(data["nodes"], list) or len(data["nodes"]) == 0:
-            return False
-
-        # Check first node has required detailed fields
-        if data["nodes"]:
-            node = data["nodes"][0]
-            required_node_keys = ["id", "title", "description", "x", "y", "details", "processes", "considerations"]
-            if not all(key in node for key in required_node_keys):
-                return False
-
-        return True
+        return list(_DOMAIN_STAKEHOLDERS.get(domain, _DEFAULT_STAKEHOLDERS))
 
     def _create_detailed_fallback_concepts(self, prompt: str) -> Dict[str, Any]:
         """Create detailed fallback concept structure"""
@@ -683,8 +1315,8 @@ class MindmapGenerator:
             "relationships": relationships
         }
 
-    def _create_detailed_fallback_structure(self, parsed_data: Dict) -> Dict[str, Any]:
-        """Create detailed fallback structure with flowchart layout"""
+    def _structure_knowledge_detailed(self, parsed_data: Dict) -> Dict[str, Any]:
+        """Lay out detailed concepts as a top-down tree of MindmapNode rows, one per level, without an API call"""
         title = parsed_data.get("main_topic", "Mindmap")
         description = parsed_data.get("topic_description", "Comprehensive system analysis")
         concepts = parsed_data.get("concepts", [])
@@ -694,65 +1326,65 @@ class MindmapGenerator:
         nodes = []
         edges = []
 
-        # Enhanced color scheme based on node types
-        color_map = {
-            "start": "#2c3e50",      # Dark blue-gray
-            "process": "#3498db",     # Blue
-            "decision": "#e74c3c",    # Red
-            "outcome": "#27ae60",     # Green
-            "checkpoint": "#f39c12",  # Orange
-            "end": "#9b59b6"          # Purple
-        }
-
-        # Layout configurations for different workflow types
-        if workflow_type == "flowchart" or workflow_type == "sequential":
-            # Vertical flowchart layout
-            start_x, start_y = 600, 150
-            spacing_y = 200
-
-            for i, concept in enumerate(concepts):
+        # Group concepts into rows by level, keeping the order Claude listed them in
+        rows: Dict[int, List[Dict]] = defaultdict(list)
+        for concept in concepts:
+            level = concept.get("level", 0)
+            rows[level if isinstance(level, int) else 0].append(concept)
+
+        # Order each row by parent position and center it beneath its parents, so children sit below them
+        center_x, start_y = _LAYOUT_CENTER_X, _LAYOUT_START_Y
+        spacing_x, spacing_y = _LAYOUT_SPACING_X, _LAYOUT_SPACING_Y
+        parent_x: Dict[str, int] = {}
+        max_level = 0
+
+        for level in sorted(rows):
+            if level > max_level:
+                max_level = level
+            anchors = [parent_x.get(concept.get("parent"), center_x) for concept in rows[level]]
+            row = [concept for _, concept in sorted(zip(anchors, rows[level]), key=lambda pair: pair[0])]
+            # Row-wide values are computed once; the per-node work is a single add
+            row_start = sum(anchors) / len(anchors) - (len(row) - 1) / 2 * spacing_x
+            xs = [round(row_start + i * spacing_x) for i in range(len(row))]
+            width, height = _ROOT_NODE_SIZE if level == 0 else _NODE_SIZE
+            y = start_y + level * spacing_y
+
+            for concept, x in zip(row, xs):
+                parent_x[concept["id"]] = x
                 node_type = concept.get("node_type", "process")
-                level = concept.get("level", 0)
-
-                # Calculate position for flowchart
-                if level == 0:
-                    x, y = start_x, start_y
-                    width, height = 300, 100
-                else:
-                    x = start_x + (level - 1) * 50  # Slight offset for levels
-                    y = start_y + (i * spacing_y)
-                    width, height = 250, 80
-
-                nodes.append({
-                    "id": concept["id"],
-                    "title": concept["title"][:30],
-                    "description": concept.get("description", "Process component"),
-                    "level": level,
-                    "x": x,
-                    "y": y,
-                    "width": width,
-                    "height": height,
-                    "color": color_map.get(node_type, "#3498db"),
-                    "shape": "diamond" if node_type == "decision" else "rectangle",
-                    "category": concept.get("category", "process"),
-                    "node_type": node_type,
-                    "what": concept.get("what", "Process step"),
-                    "why": concept.get("why", "Critical for success"),
-                    "how": concept.get("how", "Systematic implementation"),
-                    "examples": concept.get("examples", ["Example 1", "Example 2"]),
-                    "metrics": concept.get("metrics", ["Metric 1", "Metric 2"]),
-                    "details": concept.get("details", ["Detail 1", "Detail 2"]),
-                    "processes": concept.get("processes", ["Step 1", "Step 2"]),
-                    "considerations": concept.get("considerations", ["Consideration 1"]),
-                    "tools_technologies": concept.get("tools_technologies", ["Tool 1"]),
-                    "stakeholders": concept.get("stakeholders", ["Role 1"]),
-                    "expanded": level == 0
-                })
-
-        # Create edges based on relationships
+
+                nodes.append(MindmapNode(
+                    id=concept["id"],
+                    title=_trunc30(concept["title"]),
+                    description=concept.get("description", "Process component"),
+                    level=level,
+                    x=x,
+                    y=y,
+                    width=width,
+                    height=height,
+                    color=_NODE_TYPE_COLORS.get(node_type, _DEFAULT_NODE_COLOR),
+                    shape="diamond" if node_type == "decision" else "rectangle",
+                    category=concept.get("category", "process"),
+                    node_type=node_type,
+                    what=concept.get("what", "Process step"),
+                    why=concept.get("why", "Critical for success"),
+                    how=concept.get("how", "Systematic implementation"),
+                    examples=concept.get("examples", _DEFAULT_EXAMPLES),
+                    metrics=concept.get("metrics", _DEFAULT_METRICS),
+                    details=concept.get("details", _DEFAULT_DETAILS),
+                    processes=concept.get("processes", _DEFAULT_PROCESSES),
+                    considerations=concept.get("considerations", _DEFAULT_CONSIDERATIONS),
+                    tools_technologies=concept.get("tools_technologies", _DEFAULT_TOOLS_TECHNOLOGIES),
+                    stakeholders=concept.get("stakeholders", _DEFAULT_STAKEHOLDER_ROLES),
+                    expanded=level == 0
+                ))
+
+        # Create edges based on relationships, indexing outgoing edges per node in the same pass
+        # so consumers can walk the graph without rescanning the edge list
+        edges_index: Dict[str, List[Dict]] = defaultdict(list)
         relationships = parsed_data.get("relationships", [])
         for i, rel in enumerate(relationships):
-            edges.append({
+            edge = {
                 "id": f"edge_{i+1}",
                 "from": rel["from"],
                 "to": rel["to"],
@@ -761,22 +1393,25 @@ class MindmapGenerator:
                 "color": "#34495e",
                 "weight": 3,
                 "style": "solid"
-            })
+            }
+            edges.append(edge)
+            edges_index[edge["from"]].append(edge)
 
         return {
             "title": title,
             "description": description,
-            "layout_type": "flowchart",
+            "layout_type": "hierarchical",
             "domain": domain,
             "complexity": parsed_data.get("complexity_level", "intermediate"),
             "workflow_type": workflow_type,
             "metadata": {
                 "total_nodes": len(nodes),
-                "max_depth": max([node.get("level", 0) for node in nodes], default=0),
+                "max_depth": max_level,
                 "creation_context": "Enhanced intelligent structure"
             },
             "nodes": nodes,
-            "edges": edges
+            "edges": edges,
+            "edges_index": dict(edges_index)
         }
 
     def _create_detailed_fallback_xml(self, structured_data: Dict, original_prompt: str) -> str:
@@ -786,56 +1421,58 @@ class MindmapGenerator:
         description = structured_data.get("description", "Comprehensive mindmap")
         timestamp = datetime.now().isoformat()
 
-        return f"""<?xml version="1.0" encoding="UTF-8"?>
-<mindmap version="2.0" editable="true">
-    <metadata>
-        <title>{title}</title>
-        <description>{description}</description>
-        <created_at>{timestamp}</created_at>
-        <layout_type>hierarchical</layout_type>
-        <domain>general</domain>
-        <complexity>intermediate</complexity>
-        <total_nodes>1</total_nodes>
-        <max_depth>0</max_depth>
-        <generation_context>Generated from: {original_prompt}</generation_context>
-    </metadata>
-    <nodes>
-        <node id="root" level="0" category="core" expanded="true">
-            <content>
-                <title>{title}</title>
-                <description>{description}</description>
-            </content>
-            <position x="400" y="300" width="200" height="80"/>
-            <style color="#2c3e50" shape="rectangle" border="solid"/>
-            <details>
-                <item>Core concept requiring systematic approach</item>
-                <item>Multiple interconnected components</item>
-            </details>
-            <processes>
-                <step>Initial analysis and planning</step>
-                <step>Implementation and execution</step>
-            </processes>
-            <considerations>
-                <point>Consider stakeholder requirements</point>
-                <point>Ensure scalable solution</point>
-            </considerations>
-        </node>
-    </nodes>
-    <edges>
-    </edges>
-</mindmap>"""
+        # Built as a tree so lxml escapes user-supplied text instead of it being interpolated raw
+        root = etree.Element("mindmap", version="2.0", editable="true")
+
+        metadata = etree.SubElement(root, "metadata")
+        for tag, text in (
+            ("title", title),
+            ("description", description),
+            ("created_at", timestamp),
+            ("layout_type", "hierarchical"),
+            ("domain", "general"),
+            ("complexity", "intermediate"),
+            ("total_nodes", "1"),
+            ("max_depth", "0"),
+            ("generation_context", f"Generated from: {original_prompt}"),
+        ):
+            etree.SubElement(metadata, tag).text = text
+
+        nodes = etree.SubElement(root, "nodes")
+        node = etree.SubElement(nodes, "node", id="root", level="0", category="core", expanded="true")
+        content = etree.SubElement(node, "content")
+        etree.SubElement(content, "title").text = title
+        etree.SubElement(content, "description").text = description
+        etree.SubElement(node, "position", x="400", y="300", width="200", height="80")
+        etree.SubElement(node, "style", color="#2c3e50", shape="rectangle", border="solid")
+        for group, tag, items in (
+            ("details", "item", ("Core concept requiring systematic approach", "Multiple interconnected components")),
+            ("processes", "step", ("Initial analysis and planning", "Implementation and execution")),
+            ("considerations", "point", ("Consider stakeholder requirements", "Ensure scalable solution")),
+        ):
+            parent = etree.SubElement(node, group)
+            for text in items:
+                etree.SubElement(parent, tag).text = text
+
+        etree.SubElement(root, "edges")
+
+        etree.indent(root, space="    ")
+        return etree.tostring(root, pretty_print=True, xml_declaration=True, encoding="UTF-8").decode()
 
 # Utility functions remain the same with enhanced support
-async def generate_mindmap_from_prompt(prompt: str, api_key: str = None) -> str:
-    """Simple function to generate detailed mindmap XML from a prompt"""
+async def generate_mindmap_from_prompt(prompt: str, api_key: str = None, use_cache: bool = True) -> str:
+    """Simple function to generate detailed mindmap XML from a prompt, reusing cached results unless use_cache is False"""
 
     if not api_key:
         api_key = os.getenv("ANTHROPIC_API_KEY")
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable not set or api_key not provided")
 
-    generator = MindmapGenerator(api_key)
-    return await generator.generate_mindmap(prompt)
+    generator = MindmapGenerator(api_key, stage_cache_path=STAGE_CACHE_PATH if use_cache else None)
+    try:
+        return await generator.generate_mindmap(prompt)
+    finally:
+        await generator.aclose()
 
 def save_mindmap_xml(xml_content: str, filename: str = None) -> str:
     """Save XML content to file"""
@@ -849,47 +1486,173 @@ def save_mindmap_xml(xml_content: str, filename: str = None) -> str:
     print(f"💾 Enhanced mindmap saved to: {filename}")
     return filename
 
+async def save_mindmap_xml_async(xml_content: str, filename: str = None) -> str:
+    """Save XML content to file from a worker thread so the event loop keeps running during disk I/O"""
+    return await asyncio.to_thread(save_mindmap_xml, xml_content, filename)
+
+def _node_element(node: MindmapNode) -> Any:
+    """Build the <node> element for one laid-out node"""
+    element = etree.Element("node", id=str(node.id), level=str(node.level), category=str(node.category),
+                            expanded="true" if node.expanded else "false")
+    content = etree.SubElement(element, "content")
+    etree.SubElement(content, "title").text = str(node.title)
+    etree.SubElement(content, "description").text = str(node.description)
+    etree.SubElement(element, "position", x=str(node.x), y=str(node.y), width=str(node.width), height=str(node.height))
+    etree.SubElement(element, "style", color=node.color, shape=node.shape, border="solid")
+    for group, tag, items in (
+        ("details", "item", node.details),
+        ("processes", "step", node.processes),
+        ("considerations", "point", node.considerations),
+    ):
+        parent = etree.SubElement(element, group)
+        for text in items:
+            etree.SubElement(parent, tag).text = str(text)
+    return element
+
+def _edge_element(edge: Dict[str, Any]) -> Any:
+    """Build the <edge> element for one edge"""
+    element = etree.Element("edge", id=str(edge["id"]), source=str(edge["from"]), target=str(edge["to"]))
+    etree.SubElement(element, "label").text = str(edge.get("label", "connects"))
+    etree.SubElement(element, "description").text = str(edge.get("description", ""))
+    etree.SubElement(element, "style", color=str(edge.get("color", "#34495e")), weight=str(edge.get("weight", 2)),
+                     line_style=str(edge.get("style", "solid")))
+    return element
+
+def _metadata_element(structured_data: Dict, original_prompt: str) -> Any:
+    """Build the <metadata> element for locally laid-out structured data"""
+    metadata = structured_data.get("metadata", {})
+    header = etree.Element("metadata")
+    for tag, text in (
+        ("title", structured_data.get("title", "Mindmap")),
+        ("description", structured_data.get("description", "Comprehensive mindmap")),
+        ("created_at", datetime.now().isoformat()),
+        ("layout_type", structured_data.get("layout_type", "hierarchical")),
+        ("domain", structured_data.get("domain", "general")),
+        ("complexity", structured_data.get("complexity", "intermediate")),
+        ("total_nodes", metadata.get("total_nodes", len(structured_data.get("nodes", [])))),
+        ("max_depth", metadata.get("max_depth", 0)),
+        ("generation_context", f"Generated from: {original_prompt}"),
+    ):
+        etree.SubElement(header, tag).text = str(text)
+    return header
+
+def render_mindmap_xml(structured_data: Dict, original_prompt: str = "") -> str:
+    """Render locally laid-out structured data as mindmap XML without calling Claude"""
+    root = etree.Element("mindmap", version="2.0", editable="true")
+    root.append(_metadata_element(structured_data, original_prompt))
+    for section, items, build in (
+        ("nodes", structured_data.get("nodes", []), _node_element),
+        ("edges", structured_data.get("edges", []), _edge_element),
+    ):
+        etree.SubElement(root, section).extend(build(item) for item in items)
+
+    etree.indent(root, space="    ")
+    return etree.tostring(root, pretty_print=True, xml_declaration=True, encoding="UTF-8").decode()
+
+def save_mindmap_stream(structured_data: Dict, filename: str = None, original_prompt: str = "") -> str:
+    """Write locally laid-out structured data as mindmap XML, serializing one node or edge at a time"""
+    if not filename:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"detailed_mindmap_{timestamp}.xml"
+
+    with etree.xmlfile(filename, encoding="UTF-8") as xf:
+        xf.write_declaration()
+        with xf.element("mindmap", version="2.0", editable="true"):
+            header = _metadata_element(structured_data, original_prompt)
+            etree.indent(header, space="    ", level=1)
+            header.tail = "\n    "
+            xf.write("\n    ", header)
+
+            for section, items, build in (
+                ("nodes", structured_data.get("nodes", []), _node_element),
+                ("edges", structured_data.get("edges", []), _edge_element),
+            ):
+                with xf.element(section):
+                    for item in items:
+                        element = build(item)
+                        etree.indent(element, space="    ", level=2)
+                        xf.write("\n        ", element)
+                        # Hand each finished element to the file so only one is held in memory at a time
+                        xf.flush()
+                    xf.write("\n    ")
+                xf.write("\n" if section == "edges" else "\n    ")
+
+    print(f"💾 Enhanced mindmap saved to: {filename}")
+    return filename
+
 # Main execution
 async def main():
     """Main function for command line usage"""
-    import sys
-
     api_key = os.getenv("ANTHROPIC_API_KEY")
     if not api_key:
         print("❌ Please set ANTHROPIC_API_KEY environment variable")
         sys.exit(1)
 
-    if len(sys.argv) > 1:
-        prompt = " ".join(sys.argv[1:])
+    args = sys.argv[1:]
+    use_cache = "--no-cache" not in args
+    args = [arg for arg in args if arg != "--no-cache"]
+
+    if args:
+        prompts = [" ".join(args)]
+    elif not sys.stdin.isatty():
+        # Piped input holds one prompt per line
+        prompts = [line for line in sys.stdin.read().splitlines() if line.strip()]
     else:
-        prompt = input("Enter your detailed mindmap prompt: ")
+        prompts = [input("Enter your detailed mindmap prompt: ")]
 
-    if not prompt.strip():
+    if not prompts or not all(prompt.strip() for prompt in prompts):
         print("❌ Empty prompt provided")
         sys.exit(1)
 
+    listener = setup_logging(logging.INFO)
+    # One generator shares its connection pool, concurrency cap and caches across all prompts
+    generator = MindmapGenerator(api_key, stage_cache_path=STAGE_CACHE_PATH if use_cache else None)
     try:
         start_time = time.time()
-        xml_content = await generate_mindmap_from_prompt(prompt, api_key)
+        results = await asyncio.gather(*(generator.generate_mindmap(prompt) for prompt in prompts), return_exceptions=True)
         end_time = time.time()
 
-        filename = save_mindmap_xml(xml_content)
+        if len(prompts) == 1:
+            xml_content = results[0]
+            if isinstance(xml_content, BaseException):
+                raise xml_content
+
+            filename = await save_mindmap_xml_async(xml_content)
 
-        print(f"\n📊 Enhanced generation completed in {end_time - start_time:.2f} seconds")
-        print(f"📄 XML length: {len(xml_content)} characters")
-        print(f"💾 Saved to: {filename}")
+            print(f"\n📊 Enhanced generation completed in {end_time - start_time:.2f} seconds")
+            print(f"📄 XML length: {len(xml_content)} characters")
+            print(f"💾 Saved to: {filename}")
+
+            print_xml = input("\nPrint detailed XML to console? (y/n): ").lower().startswith('y')
+            if print_xml:
+                print("\n" + "="*60)
+                print("GENERATED DETAILED XML:")
+                print("="*60)
+                print(xml_content)
+                print("="*60)
+        else:
+            # Timestamps only have second resolution, so each file is numbered after its prompt's line
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            saved = [
+                (prompt, xml_content, f"detailed_mindmap_{timestamp}_{i + 1}.xml")
+                for i, (prompt, xml_content) in enumerate(zip(prompts, results))
+                if not isinstance(xml_content, BaseException)
+            ]
+            await asyncio.gather(*(save_mindmap_xml_async(xml_content, filename) for _, xml_content, filename in saved))
 
-        print_xml = input("\nPrint detailed XML to console? (y/n): ").lower().startswith('y')
-        if print_xml:
-            print("\n" + "="*60)
-            print("GENERATED DETAILED XML:")
-            print("="*60)
-            print(xml_content)
-            print("="*60)
+            print(f"\n📊 Generated {len(saved)}/{len(prompts)} mindmaps in {end_time - start_time:.2f} seconds")
+            for prompt, result in zip(prompts, results):
+                if isinstance(result, BaseException):
+                    print(f"❌ '{prompt[:50]}': {result}")
+            if len(saved) < len(prompts):
+                sys.exit(1)
 
     except Exception as e:
         print(f"❌ Error: {e}")
         sys.exit(1)
+    finally:
+        await generator.aclose()
+        listener.stop()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
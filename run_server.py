@@ -4,17 +4,26 @@ Startup script for the Mindmap Generator System
 Handles environment setup and server launch
 """
 
+import hashlib
 import os
 import subprocess
 import sys
 from pathlib import Path
 
 
+def write_lines(*lines):
+    """Write a block of console lines with a single write instead of one print per line"""
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
+
 def check_requirements():
     """Check if required files exist"""
     required_files = [
         "mindmap_generator.py",
         "server.py",
+        "static/index.html",
+        "static/app.js",
+        "static/app.css",
         "requirements.txt"
     ]
 
@@ -24,14 +33,16 @@ def check_requirements():
             missing_files.append(file)
 
     if missing_files:
-        print("❌ Missing required files:")
-        for file in missing_files:
-            print(f"   - {file}")
-        print("\n📋 Please make sure all files are in the same directory:")
-        print("   - mindmap_generator.py (your main script)")
-        print("   - server.py (the FastAPI backend)")
-        print("   - requirements.txt (dependencies)")
-        print("   - run_server.py (this file)")
+        write_lines(
+            "❌ Missing required files:",
+            *(f"   - {file}" for file in missing_files),
+            "\n📋 Please make sure all files are in the same directory:",
+            "   - mindmap_generator.py (your main script)",
+            "   - server.py (the FastAPI backend)",
+            "   - static/ (the web interface: index.html, app.js, app.css)",
+            "   - requirements.txt (dependencies)",
+            "   - run_server.py (this file)"
+        )
         return False
 
     return True
@@ -40,12 +51,14 @@ def check_api_key():
     """Check if Anthropic API key is set"""
     api_key = os.getenv("ANTHROPIC_API_KEY")
     if not api_key:
-        print("⚠️  ANTHROPIC_API_KEY environment variable not found!")
-        print("\n🔑 To set your API key:")
-        print("   Windows: set ANTHROPIC_API_KEY=your_api_key_here")
-        print("   Mac/Linux: export ANTHROPIC_API_KEY=your_api_key_here")
-        print("\n💡 Or create a .env file with:")
-        print("   ANTHROPIC_API_KEY=your_api_key_here")
+        write_lines(
+            "⚠️  ANTHROPIC_API_KEY environment variable not found!",
+            "\n🔑 To set your API key:",
+            "   Windows: set ANTHROPIC_API_KEY=your_api_key_here",
+            "   Mac/Linux: export ANTHROPIC_API_KEY=your_api_key_here",
+            "\n💡 Or create a .env file with:",
+            "   ANTHROPIC_API_KEY=your_api_key_here"
+        )
 
         # Ask if they want to continue anyway
         response = input("\n❓ Continue without API key? (y/n): ").lower()
@@ -56,13 +69,22 @@ def check_api_key():
 
     return True
 
+DEPS_STAMP = Path(".deps.sha256")
+
 def install_dependencies():
-    """Install required Python packages"""
+    """Install required Python packages, skipping pip when requirements are unchanged since the last install"""
+    # The interpreter is part of the hash so switching virtualenvs triggers a fresh install
+    deps_hash = hashlib.sha256(sys.executable.encode() + Path("requirements.txt").read_bytes()).hexdigest()
+    if DEPS_STAMP.exists() and DEPS_STAMP.read_text().strip() == deps_hash:
+        print("✅ Dependencies up to date")
+        return True
+
     print("📦 Installing dependencies...")
     try:
         subprocess.check_call([
             sys.executable, "-m", "pip", "install", "-r", "requirements.txt"
         ])
+        DEPS_STAMP.write_text(deps_hash)
         print("✅ Dependencies installed successfully")
         return True
     except subprocess.CalledProcessError as e:
@@ -71,21 +93,31 @@ def install_dependencies():
 
 def start_server():
     """Start the FastAPI server"""
-    print("🚀 Starting Mindmap Generator Server...")
-    print("🌐 Web interface will be available at: http://localhost:8000")
-    print("📚 API documentation at: http://localhost:8000/docs")
-    print("🛑 Press Ctrl+C to stop the server")
-    print("-" * 60)
+    write_lines(
+        "🚀 Starting Mindmap Generator Server...",
+        "🌐 Web interface will be available at: http://localhost:8000",
+        "📚 API documentation at: http://localhost:8000/docs",
+        "🛑 Press Ctrl+C to stop the server",
+        "-" * 60
+    )
 
     try:
         # Import and run the server
         import uvicorn
+
+        # The reload watcher is single-process and slow, so it is only used when DEV is set;
+        # uvicorn[standard] already picks uvloop and httptools where the platform supports them
+        if os.getenv("DEV"):
+            options = {"reload": True}
+        else:
+            options = {"workers": int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))}
+
         uvicorn.run(
             "server:app",
             host="0.0.0.0",
             port=8000,
-            reload=True,
-            log_level="info"
+            log_level="info",
+            **options
         )
     except ImportError:
         print("❌ uvicorn not installed. Please run: pip install -r requirements.txt")
@@ -99,8 +131,7 @@ def start_server():
 
 def main():
     """Main startup function"""
-    print("🧠 Mindmap Generator System Startup")
-    print("=" * 50)
+    write_lines("🧠 Mindmap Generator System Startup", "=" * 50)
 
     # Check requirements
     if not check_requirements():
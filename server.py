@@ -5,29 +5,58 @@ Integrates with the enhanced mindmap generator script
 """
 
 import asyncio
+import functools
+import gzip
+import hashlib
+import logging
 import os
+import re
 import time
-import traceback
+import zlib
+from contextlib import asynccontextmanager
+from collections import OrderedDict
 from datetime import datetime
-from typing import Any, Dict, Optional
+from io import BytesIO
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+
+import orjson
 
 import uvicorn
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from lxml import etree
 
 # Import the enhanced mindmap generator
-from mindmap_generator import MindmapGenerator
-from pydantic import BaseModel, Field
+from mindmap_generator import MindmapGenerator, normalize_prompt, setup_logging
+from pydantic import BaseModel, ConfigDict, Field
+from starlette.datastructures import Headers, MutableHeaders
+
+
+logger = logging.getLogger(__name__)
+
+# Read once per worker; messages below this level are dropped before their arguments are formatted
+LOG_LEVEL = os.getenv("LOG_LEVEL", "WARNING").upper()
+
+# Largest XML document accepted for validation, so oversized payloads are rejected before parsing
+MAX_XML_LENGTH = 256 * 1024
+
+# Shared well-formedness parser: no entity expansion, network access or huge-tree mode for user XML
+_XML_PARSER = etree.XMLParser(resolve_entities=False, no_network=True, huge_tree=False, recover=False)
 
 
 class MindmapRequest(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True, frozen=True, extra="forbid")
+
     prompt: str = Field(..., min_length=10, max_length=2000, description="The mindmap prompt")
 
 
 class EditRequest(BaseModel):
-    xml_content: str = Field(..., description="The XML content to validate and save")
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
+    xml_content: str = Field(..., max_length=MAX_XML_LENGTH, description="The XML content to validate and save")
 
 
 class MindmapResponse(BaseModel):
@@ -35,6 +64,8 @@ class MindmapResponse(BaseModel):
     processing_time: float
     metadata: Dict[str, Any]
     success: bool
+    # Nodes and edges already extracted from xml_content, so the browser can render without reparsing
+    model: Optional[Dict[str, Any]] = None
 
 
 class EditResponse(BaseModel):
@@ -49,27 +80,171 @@ class HealthResponse(BaseModel):
     api_key_configured: bool
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize and warm up services on startup, and release them on shutdown"""
+    log_listener = setup_logging(getattr(logging, LOG_LEVEL, logging.WARNING))
+    logger.info("🚀 Starting Enhanced Mindmap Generator API...")
+    success = initialize_generator()
+    if success:
+        await mindmap_generator.warmup()
+        logger.info("🎉 Server ready! Open http://localhost:8000 to use the enhanced interface")
+    else:
+        logger.warning("⚠️ Server started but mindmap generation may not work without API key")
+
+    yield
+
+    if mindmap_generator is not None:
+        await mindmap_generator.aclose()
+    log_listener.stop()
+
+
 # Initialize FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="Enhanced AI Mindmap Generator API",
     description="Generate detailed, editable mindmaps from natural language using AI",
     version="2.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    # Generate responses carry the whole XML document, so JSON is encoded with orjson
+    default_response_class=ORJSONResponse
 )
 
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, specify your frontend domain
-    allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT"],
-    allow_headers=["*"],
-)
+# The bundled frontend is served from this origin, so CORS is only needed when the API is
+# called from another site; set ENABLE_CORS (and CORS_ORIGINS, comma-separated) to allow that
+if os.getenv("ENABLE_CORS"):
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=os.getenv("CORS_ORIGINS", "*").split(","),
+        allow_credentials=False,
+        allow_methods=["GET", "POST", "PUT"],
+        allow_headers=["*"],
+    )
+
+
+class StreamingGZipMiddleware:
+    """GZip that keeps streamed NDJSON events flowing as they are produced.
+
+    Buffered responses are compressed whole; streamed ones are sync-flushed after every chunk so each
+    event reaches the client immediately instead of waiting in zlib's buffer.
+    """
+
+    def __init__(self, app, minimum_size: int = 500, compresslevel: int = 9) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or "gzip" not in Headers(scope=scope).get("accept-encoding", ""):
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message) -> None:
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether compression applies
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                if "content-encoding" in headers or (not more_body and len(body) < self.minimum_size):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+                headers["Content-Encoding"] = "gzip"
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = compressor.compress(body) + compressor.flush()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start_message)
+
+            if more_body:
+                body = compressor.compress(body) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            else:
+                body = compressor.compress(body) + compressor.flush()
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+# Mindmap XML and JSON compress several-fold; responses that already carry a Content-Encoding,
+# like the precompressed frontend shell, pass through untouched
+app.add_middleware(StreamingGZipMiddleware, minimum_size=1024, compresslevel=5)
 
 # Global mindmap generator instance
 mindmap_generator = None
 
+# Bounds how many generations one worker runs at once; the generator is natively async,
+# so waiting requests only hold a coroutine and the event loop keeps serving other routes
+_GEN_SEM = asyncio.Semaphore(int(os.getenv("MAX_CONCURRENT_GEN", "4")))
+
+# Finished (xml, metadata, model) results keyed by prompt hash, so repeated prompts such as the
+# bundled samples skip generation and XML extraction entirely
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+_RESPONSE_CACHE: "OrderedDict[bytes, tuple]" = OrderedDict()
+
+# One lock per in-flight prompt, so concurrent identical requests share a single generation
+_PROMPT_LOCKS: Dict[bytes, asyncio.Lock] = {}
+# Requests holding or waiting on each prompt lock; the lock is dropped only when none remain
+_PROMPT_LOCK_USERS: Dict[bytes, int] = {}
+
+
+def _cached_response(key: bytes) -> Optional[tuple]:
+    """Return the cached (xml, metadata, model) result for key, dropping it if expired"""
+    entry = _RESPONSE_CACHE.get(key)
+    if entry is None:
+        return None
+    expires_at, result = entry
+    if expires_at < time.monotonic():
+        del _RESPONSE_CACHE[key]
+        return None
+    _RESPONSE_CACHE.move_to_end(key)
+    return result
+
+
+def _cache_response(key: bytes, result: tuple):
+    """Store an (xml, metadata, model) result, evicting the least recently used entry"""
+    _RESPONSE_CACHE[key] = (time.monotonic() + RESPONSE_CACHE_TTL, result)
+    _RESPONSE_CACHE.move_to_end(key)
+    if len(_RESPONSE_CACHE) > RESPONSE_CACHE_SIZE:
+        _RESPONSE_CACHE.popitem(last=False)
+
+
+@asynccontextmanager
+async def _prompt_lock(key: bytes):
+    """Hold the in-flight lock for a prompt, dropping it once nothing else is using it"""
+    lock = _PROMPT_LOCKS.setdefault(key, asyncio.Lock())
+    _PROMPT_LOCK_USERS[key] = _PROMPT_LOCK_USERS.get(key, 0) + 1
+    try:
+        async with lock:
+            yield
+    finally:
+        # A released lock may still have a woken waiter that hasn't re-acquired it yet, so count users
+        _PROMPT_LOCK_USERS[key] -= 1
+        if not _PROMPT_LOCK_USERS[key]:
+            del _PROMPT_LOCK_USERS[key]
+            del _PROMPT_LOCKS[key]
+
 
 def initialize_generator():
     """Initialize the mindmap generator with API key"""
@@ -77,1102 +252,263 @@ def initialize_generator():
 
     api_key = os.getenv("ANTHROPIC_API_KEY")
     if not api_key:
-        print("❌ Warning: ANTHROPIC_API_KEY environment variable not set!")
+        logger.warning("❌ ANTHROPIC_API_KEY environment variable not set!")
         return False
 
     try:
         mindmap_generator = MindmapGenerator(api_key)
-        print("✅ Enhanced mindmap generator initialized successfully")
+        logger.info("✅ Enhanced mindmap generator initialized successfully")
         return True
     except Exception as e:
-        print(f"❌ Failed to initialize mindmap generator: {e}")
+        logger.error("❌ Failed to initialize mindmap generator: %s", e)
         return False
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize services on startup"""
-    print("🚀 Starting Enhanced Mindmap Generator API...")
-    success = initialize_generator()
-    if success:
-        print("🎉 Server ready! Open http://localhost:8000 to use the enhanced interface")
-    else:
-        print("⚠️ Server started but mindmap generation may not work without API key")
-
-@app.get("/", response_class=HTMLResponse)
-async def serve_frontend():
-    """Serve the enhanced frontend HTML interface with editing capabilities"""
-    try:
-        html_content = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Enhanced Mindmap Generator & Editor</title>
-    <style>
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            display: flex;
-            flex-direction: column;
-        }
-
-        .header {
-            background: rgba(255, 255, 255, 0.1);
-            backdrop-filter: blur(10px);
-            padding: 20px;
-            text-align: center;
-            border-bottom: 1px solid rgba(255, 255, 255, 0.2);
-        }
-
-        .header h1 {
-            color: white;
-            font-size: 2em;
-            margin-bottom: 10px;
-        }
-
-        .header p {
-            color: rgba(255, 255, 255, 0.8);
-            font-size: 1.1em;
-        }
-
-        .main-container {
-            display: flex;
-            flex: 1;
-            gap: 20px;
-            padding: 20px;
-            min-height: 0;
-        }
-
-        .left-panel {
-            background: rgba(255, 255, 255, 0.95);
-            border-radius: 15px;
-            padding: 25px;
-            box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
-            width: 400px;
-            display: flex;
-            flex-direction: column;
-        }
-
-        .right-panel {
-            display: flex;
-            flex-direction: column;
-            flex: 1;
-            gap: 20px;
-            min-height: 0;
-        }
-
-        .mindmap-panel {
-            background: rgba(255, 255, 255, 0.95);
-            border-radius: 15px;
-            padding: 25px;
-            box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
-            flex: 1;
-            display: flex;
-            flex-direction: column;
-            min-height: 0;
-        }
-
-        .editor-panel {
-            background: rgba(255, 255, 255, 0.95);
-            border-radius: 15px;
-            padding: 25px;
-            box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
-            height: 300px;
-            display: flex;
-            flex-direction: column;
-        }
+# The frontend is static: CSS and JS are served from STATIC_DIR under content-versioned URLs,
+# while the small HTML shell is encoded, compressed and fingerprinted once at import
+STATIC_DIR = Path(__file__).resolve().parent / "static"
 
-        .tabs {
-            display: flex;
-            border-bottom: 2px solid #e1e8ed;
-            margin-bottom: 20px;
-        }
 
-        .tab {
-            background: none;
-            border: none;
-            padding: 12px 20px;
-            cursor: pointer;
-            font-size: 14px;
-            font-weight: 600;
-            color: #666;
-            border-bottom: 3px solid transparent;
-            transition: all 0.3s ease;
-        }
+class VersionedStaticFiles(StaticFiles):
+    """Static files that browsers may cache forever when requested with a content version"""
 
-        .tab.active {
-            color: #667eea;
-            border-bottom-color: #667eea;
-        }
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if scope["query_string"].startswith(b"v="):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
 
-        .tab-content {
-            display: none;
-            flex: 1;
-        }
 
-        .tab-content.active {
-            display: flex;
-            flex-direction: column;
-        }
+def _versioned_shell() -> str:
+    """Read the HTML shell, pointing each asset reference at a URL that changes with its content"""
+    html = (STATIC_DIR / "index.html").read_text(encoding="utf-8")
+    for asset in ("app.css", "app.js"):
+        version = hashlib.sha256((STATIC_DIR / asset).read_bytes()).hexdigest()[:16]
+        html = html.replace(f'"/static/{asset}"', f'"/static/{asset}?v={version}"')
+    return html
 
-        .form-group {
-            margin-bottom: 20px;
-        }
 
-        .form-group label {
-            display: block;
-            margin-bottom: 8px;
-            font-weight: 600;
-            color: #333;
-        }
+_FRONTEND_BYTES = _versioned_shell().encode("utf-8")
+_FRONTEND_GZIP = gzip.compress(_FRONTEND_BYTES, compresslevel=6)
+_FRONTEND_ETAG = '"' + hashlib.sha256(_FRONTEND_BYTES).hexdigest()[:16] + '"'
+_FRONTEND_HEADERS = {"ETag": _FRONTEND_ETAG, "Cache-Control": "public, max-age=3600", "Vary": "Accept-Encoding"}
 
-        .form-group textarea {
-            width: 100%;
-            padding: 12px;
-            border: 2px solid #e1e8ed;
-            border-radius: 8px;
-            font-size: 14px;
-            resize: vertical;
-            min-height: 120px;
-            transition: border-color 0.3s ease;
-            font-family: monospace;
-        }
-
-        .form-group textarea:focus {
-            outline: none;
-            border-color: #667eea;
-        }
-
-        .xml-editor {
-            flex: 1;
-            font-family: 'Courier New', monospace;
-            font-size: 12px;
-            line-height: 1.4;
-            min-height: 200px;
-            background: #f8f9fa;
-        }
-
-        .generate-btn, .action-btn {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            border: none;
-            padding: 15px 30px;
-            border-radius: 25px;
-            font-size: 16px;
-            font-weight: 600;
-            cursor: pointer;
-            transition: transform 0.2s ease, box-shadow 0.2s ease;
-            margin-bottom: 15px;
-        }
-
-        .action-btn {
-            padding: 10px 20px;
-            font-size: 14px;
-            margin-right: 10px;
-            margin-bottom: 10px;
-        }
-
-        .secondary-btn {
-            background: linear-gradient(135deg, #27ae60 0%, #2ecc71 100%);
-        }
-
-        .danger-btn {
-            background: linear-gradient(135deg, #e74c3c 0%, #c0392b 100%);
-        }
-
-        .generate-btn:hover, .action-btn:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 5px 15px rgba(102, 126, 234, 0.4);
-        }
-
-        .generate-btn:disabled, .action-btn:disabled {
-            opacity: 0.6;
-            cursor: not-allowed;
-            transform: none;
-        }
-
-        .status {
-            padding: 10px;
-            border-radius: 8px;
-            margin-bottom: 15px;
-            font-weight: 500;
-        }
-
-        .status.loading {
-            background: #e3f2fd;
-            color: #1976d2;
-            border: 1px solid #bbdefb;
-        }
-
-        .status.success {
-            background: #e8f5e8;
-            color: #2e7d32;
-            border: 1px solid #c8e6c9;
-        }
-
-        .status.error {
-            background: #ffebee;
-            color: #c62828;
-            border: 1px solid #ffcdd2;
-        }
-
-        .mindmap-container {
-            flex: 1;
-            border: 2px solid #e1e8ed;
-            border-radius: 12px;
-            overflow: hidden;
-            position: relative;
-            background: #fafafa;
-            min-height: 400px;
-        }
-
-        .mindmap-svg {
-            width: 100%;
-            height: 100%;
-            min-height: 400px;
-        }
-
-        .node {
-            cursor: pointer;
-            transition: all 0.3s ease;
-        }
-
-        .node:hover {
-            filter: brightness(1.1);
-            transform: scale(1.05);
-        }
-
-        .node.expanded {
-            filter: brightness(1.2);
-        }
-
-        .node text {
-            pointer-events: none;
-            font-family: 'Segoe UI', sans-serif;
-            font-weight: 500;
-        }
-
-        .node-details {
-            display: none;
-            position: absolute;
-            background: white;
-            border: 2px solid #ddd;
-            border-radius: 8px;
-            padding: 15px;
-            box-shadow: 0 4px 12px rgba(0,0,0,0.15);
-            max-width: 300px;
-            z-index: 1000;
-        }
-
-        .node-details.show {
-            display: block;
-        }
-
-        .node-details h4 {
-            margin-bottom: 10px;
-            color: #333;
-        }
-
-        .node-details .section {
-            margin-bottom: 10px;
-        }
-
-        .node-details .section-title {
-            font-weight: bold;
-            color: #555;
-            margin-bottom: 5px;
-        }
-
-        .node-details ul {
-            margin-left: 15px;
-            font-size: 12px;
-            color: #666;
-        }
-
-        .edge {
-            stroke-width: 2;
-            fill: none;
-            marker-end: url(#arrowhead);
-        }
-
-        .controls {
-            display: flex;
-            gap: 10px;
-            margin-bottom: 15px;
-            align-items: center;
-            flex-wrap: wrap;
-        }
-
-        .control-btn {
-            background: #f5f5f5;
-            border: 1px solid #ddd;
-            padding: 8px 16px;
-            border-radius: 6px;
-            cursor: pointer;
-            font-size: 14px;
-            transition: background-color 0.2s ease;
-        }
-
-        .control-btn:hover {
-            background: #e9e9e9;
-        }
-
-        .zoom-info {
-            margin-left: auto;
-            font-size: 12px;
-            color: #666;
-        }
-
-        .metadata-info {
-            background: #f8f9fa;
-            border: 1px solid #dee2e6;
-            border-radius: 6px;
-            padding: 12px;
-            margin-bottom: 15px;
-            font-size: 12px;
-            color: #495057;
-        }
-
-        .metadata-info .meta-item {
-            display: flex;
-            justify-content: space-between;
-            margin-bottom: 5px;
-        }
 
-        .collapsible {
-            margin-bottom: 10px;
-        }
-
-        .collapsible-header {
-            background: #f1f3f4;
-            padding: 8px 12px;
-            border-radius: 4px;
-            cursor: pointer;
-            font-weight: 600;
-            user-select: none;
-        }
-
-        .collapsible-content {
-            display: none;
-            padding: 10px;
-            border-left: 3px solid #667eea;
-            margin-left: 10px;
-        }
-
-        .collapsible.open .collapsible-content {
-            display: block;
-        }
-
-        @media (max-width: 1200px) {
-            .main-container {
-                flex-direction: column;
-                gap: 15px;
-                padding: 15px;
-            }
-
-            .left-panel {
-                width: 100%;
-            }
-
-            .right-panel {
-                flex-direction: row;
-            }
-        }
-
-        @media (max-width: 768px) {
-            .right-panel {
-                flex-direction: column;
-            }
-
-            .header h1 {
-                font-size: 1.5em;
-            }
-
-            .controls {
-                flex-direction: column;
-                align-items: stretch;
-            }
-
-            .zoom-info {
-                margin-left: 0;
-                text-align: center;
-            }
-        }
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h1>🧠 Enhanced AI Mindmap Generator</h1>
-        <p>Transform your ideas into detailed, editable visual mindmaps using AI</p>
-    </div>
-
-    <div class="main-container">
-        <div class="left-panel">
-            <div class="form-group">
-                <label for="prompt">Describe your detailed mindmap:</label>
-                <textarea
-                    id="prompt"
-                    placeholder="Enter your mindmap description here...&#10;&#10;Example: Create a detailed mindmap for designing a machine learning system to predict customer churn for a SaaS company. Include data collection strategies, feature engineering techniques, model selection criteria, deployment pipeline components, monitoring systems, and business impact measurement methods."
-                ></textarea>
-            </div>
-
-            <button class="generate-btn" onclick="generateMindmap()">
-                <span id="btn-text">🚀 Generate Detailed Mindmap</span>
-            </button>
-
-            <div id="status" style="display: none;"></div>
-
-            <div class="form-group">
-                <label>Sample Detailed Prompts:</label>
-                <div style="display: flex; flex-direction: column; gap: 5px;">
-                    <button class="control-btn" onclick="loadDetailedSample(0)" style="text-align: left; padding: 8px;">
-                        📊 ML Customer Churn System
-                    </button>
-                    <button class="control-btn" onclick="loadDetailedSample(1)" style="text-align: left; padding: 8px;">
-                        🏗️ Microservices Architecture
-                    </button>
-                    <button class="control-btn" onclick="loadDetailedSample(2)" style="text-align: left; padding: 8px;">
-                        🎓 Complete Data Science Learning Path
-                    </button>
-                </div>
-            </div>
-
-            <div id="metadata-display" class="metadata-info" style="display: none;">
-                <div class="meta-item"><strong>Generated:</strong> <span id="meta-timestamp"></span></div>
-                <div class="meta-item"><strong>Domain:</strong> <span id="meta-domain"></span></div>
-                <div class="meta-item"><strong>Complexity:</strong> <span id="meta-complexity"></span></div>
-                <div class="meta-item"><strong>Total Nodes:</strong> <span id="meta-nodes"></span></div>
-                <div class="meta-item"><strong>Max Depth:</strong> <span id="meta-depth"></span></div>
-            </div>
-        </div>
-
-        <div class="right-panel">
-            <div class="mindmap-panel">
-                <div class="tabs">
-                    <button class="tab active" onclick="switchTab('visual')">🎨 Visual View</button>
-                    <button class="tab" onclick="switchTab('details')">📋 Node Details</button>
-                </div>
-
-                <div id="visual-tab" class="tab-content active">
-                    <div class="controls">
-                        <button class="control-btn" onclick="zoomIn()">🔍 Zoom In</button>
-                        <button class="control-btn" onclick="zoomOut()">🔍 Zoom Out</button>
-                        <button class="control-btn" onclick="resetZoom()">🎯 Reset</button>
-                        <button class="control-btn" onclick="toggleNodeDetails()">ℹ️ Toggle Details</button>
-                        <button class="control-btn" onclick="downloadSVG()">💾 Download SVG</button>
-                        <div class="zoom-info" id="zoom-info">Zoom: 100%</div>
-                    </div>
-
-                    <div class="mindmap-container" id="mindmap-container">
-                        <div style="display: flex; align-items: center; justify-content: center; height: 100%; color: #999; font-size: 18px;">
-                            Generate a mindmap to see the enhanced visualization here
-                        </div>
-                    </div>
-                </div>
-
-                <div id="details-tab" class="tab-content">
-                    <div id="node-details-list" style="overflow-y: auto; flex: 1;">
-                        <p style="color: #999; text-align: center; margin-top: 50px;">
-                            Generate a mindmap to see detailed node information here
-                        </p>
-                    </div>
-                </div>
-
-                <div class="node-details" id="node-tooltip">
-                    <h4 id="tooltip-title">Node Title</h4>
-                    <div class="section">
-                        <div class="section-title">Description:</div>
-                        <p id="tooltip-description"></p>
-                    </div>
-                    <div class="section">
-                        <div class="section-title">Details:</div>
-                        <ul id="tooltip-details"></ul>
-                    </div>
-                    <div class="section">
-                        <div class="section-title">Processes:</div>
-                        <ul id="tooltip-processes"></ul>
-                    </div>
-                    <div class="section">
-                        <div class="section-title">Considerations:</div>
-                        <ul id="tooltip-considerations"></ul>
-                    </div>
-                </div>
-            </div>
-
-            <div class="editor-panel">
-                <div class="tabs">
-                    <button class="tab active" onclick="switchEditorTab('xml')">📝 XML Editor</button>
-                    <button class="tab" onclick="switchEditorTab('raw')">🔧 Raw View</button>
-                </div>
-
-                <div id="xml-editor-tab" class="tab-content active">
-                    <div style="display: flex; gap: 10px; margin-bottom: 15px;">
-                        <button class="action-btn secondary-btn" onclick="validateXML()">✅ Validate</button>
-                        <button class="action-btn" onclick="applyChanges()">🔄 Apply Changes</button>
-                        <button class="action-btn" onclick="resetXML()">↶ Reset</button>
-                        <button class="action-btn" onclick="downloadXML()">💾 Download XML</button>
-                    </div>
-                    <textarea id="xml-editor" class="xml-editor" placeholder="Generated XML will appear here for editing..."></textarea>
-                </div>
-
-                <div id="raw-editor-tab" class="tab-content">
-                    <div style="flex: 1; background: #f8f9fa; border: 1px solid #dee2e6; border-radius: 4px; padding: 10px; overflow: auto;">
-                        <pre id="raw-xml-display" style="font-size: 11px; line-height: 1.3; color: #495057;"></pre>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-
-    <script>
-        let currentZoom = 1;
-        let currentXmlData = null;
-        let originalXmlData = null;
-        let nodeDetailsVisible = false;
-        let parsedMindmapData = null;
-
-        const detailedSamplePrompts = [
-            "Create a comprehensive mindmap for designing a machine learning system to predict customer churn for a SaaS company. Include detailed data collection strategies, feature engineering techniques, model selection criteria, cross-validation approaches, deployment pipeline components, A/B testing frameworks, monitoring systems, alert mechanisms, and business impact measurement methods with specific KPIs.",
-            "Design a detailed mindmap for a scalable microservices architecture including service decomposition strategies, API gateway patterns, database per service patterns, event-driven communication, circuit breaker implementations, distributed tracing, service mesh configurations, container orchestration, security measures, monitoring solutions, and deployment strategies with CI/CD pipeline details.",
-            "Create a comprehensive mindmap for learning data science from scratch, covering mathematical foundations (statistics, linear algebra, calculus), programming languages (Python, R, SQL), data manipulation libraries, visualization tools, machine learning algorithms (supervised, unsupervised, reinforcement), deep learning frameworks, model evaluation techniques, deployment strategies, career paths, and industry applications with specific project examples."
-        ];
-
-        function loadDetailedSample(index) {
-            document.getElementById('prompt').value = detailedSamplePrompts[index];
-        }
-
-        function switchTab(tabName) {
-            // Remove active class from all tabs and content
-            document.querySelectorAll('.tab').forEach(tab => tab.classList.remove('active'));
-            document.querySelectorAll('.tab-content').forEach(content => content.classList.remove('active'));
-
-            // Add active class to selected tab and content
-            event.target.classList.add('active');
-            document.getElementById(tabName + '-tab').classList.add('active');
-        }
-
-        function switchEditorTab(tabName) {
-            // Remove active class from editor tabs and content
-            const editorPanel = document.querySelector('.editor-panel');
-            editorPanel.querySelectorAll('.tab').forEach(tab => tab.classList.remove('active'));
-            editorPanel.querySelectorAll('.tab-content').forEach(content => content.classList.remove('active'));
-
-            // Add active class to selected tab and content
-            event.target.classList.add('active');
-            document.getElementById(tabName + '-editor-tab').classList.add('active');
-
-            if (tabName === 'raw' && currentXmlData) {
-                document.getElementById('raw-xml-display').textContent = currentXmlData;
-            }
-        }
-
-        async function generateMindmap() {
-            const prompt = document.getElementById('prompt').value.trim();
-
-            if (!prompt) {
-                showStatus('Please enter a detailed mindmap description', 'error');
-                return;
-            }
-
-            const btn = document.querySelector('.generate-btn');
-            const btnText = document.getElementById('btn-text');
-
-            btn.disabled = true;
-            btnText.textContent = '⏳ Generating Detailed Mindmap...';
-            showStatus('Generating your detailed mindmap... This may take 60-90 seconds for comprehensive analysis.', 'loading');
-
-            try {
-                const response = await fetch('/api/generate', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify({ prompt: prompt })
-                });
-
-                if (!response.ok) {
-                    throw new Error(`HTTP error! status: ${response.status}`);
-                }
-
-                const data = await response.json();
-
-                if (data.success) {
-                    currentXmlData = data.xml_content;
-                    originalXmlData = data.xml_content;
-
-                    renderEnhancedMindmap(data.xml_content);
-                    updateXMLEditor(data.xml_content);
-                    updateMetadata(data.metadata);
-
-                    showStatus(`✅ Detailed mindmap generated in ${data.processing_time.toFixed(1)}s!`, 'success');
-                } else {
-                    throw new Error(data.error || 'Generation failed');
-                }
-
-            } catch (error) {
-                console.error('Generation error:', error);
-                showStatus(`❌ Failed to generate mindmap: ${error.message}`, 'error');
-            } finally {
-                btn.disabled = false;
-                btnText.textContent = '🚀 Generate Detailed Mindmap';
-            }
-        }
-
-        function renderEnhancedMindmap(xmlContent) {
-            try {
-                const parser = new DOMParser();
-                const xmlDoc = parser.parseFromString(xmlContent, 'text/xml');
-
-                const parseError = xmlDoc.querySelector('parsererror');
-                if (parseError) {
-                    throw new Error('Invalid XML format');
-                }
-
-                // Extract enhanced data from XML
-                const nodes = Array.from(xmlDoc.querySelectorAll('node')).map(node => {
-                    const position = node.querySelector('position');
-                    const style = node.querySelector('style');
-                    const content = node.querySelector('content');
-
-                    return {
-                        id: node.getAttribute('id'),
-                        level: parseInt(node.getAttribute('level')) || 0,
-                        category: node.getAttribute('category') || 'general',
-                        expanded: node.getAttribute('expanded') === 'true',
-                        title: content ? content.querySelector('title')?.textContent || 'Unnamed' : 'Unnamed',
-                        description: content ? content.querySelector('description')?.textContent || '' : '',
-                        x: position ? parseInt(position.getAttribute('x')) || 400 : 400,
-                        y: position ? parseInt(position.getAttribute('y')) || 300 : 300,
-                        width: position ? parseInt(position.getAttribute('width')) || 160 : 160,
-                        height: position ? parseInt(position.getAttribute('height')) || 60 : 60,
-                        color: style ? style.getAttribute('color') || '#3498db' : '#3498db',
-                        shape: style ? style.getAttribute('shape') || 'rectangle' : 'rectangle',
-                        details: Array.from(node.querySelectorAll('details item')).map(item => item.textContent),
-                        processes: Array.from(node.querySelectorAll('processes step')).map(step => step.textContent),
-                        considerations: Array.from(node.querySelectorAll('considerations point')).map(point => point.textContent)
-                    };
-                });
-
-                const edges = Array.from(xmlDoc.querySelectorAll('edge')).map(edge => {
-                    const style = edge.querySelector('style');
-                    return {
-                        id: edge.getAttribute('id'),
-                        source: edge.getAttribute('source'),
-                        target: edge.getAttribute('target'),
-                        label: edge.querySelector('label')?.textContent || '',
-                        description: edge.querySelector('description')?.textContent || '',
-                        color: style ? style.getAttribute('color') || '#7f8c8d' : '#7f8c8d',
-                        weight: style ? parseInt(style.getAttribute('weight')) || 2 : 2
-                    };
-                });
-
-                parsedMindmapData = { nodes, edges };
-                drawEnhancedMindmap(nodes, edges);
-                updateNodeDetailsList(nodes);
-
-            } catch (error) {
-                console.error('XML parsing error:', error);
-                showStatus('❌ Failed to parse detailed mindmap data', 'error');
-            }
-        }
-
-        function drawEnhancedMindmap(nodes, edges) {
-            const container = document.getElementById('mindmap-container');
-
-            if (nodes.length === 0) {
-                container.innerHTML = '<div style="display: flex; align-items: center; justify-content: center; height: 100%; color: #999;">No nodes to display</div>';
-                return;
-            }
-
-            // Calculate SVG dimensions with padding
-            const maxX = Math.max(...nodes.map(n => n.x + n.width/2)) + 100;
-            const maxY = Math.max(...nodes.map(n => n.y + n.height/2)) + 100;
-            const minX = Math.min(...nodes.map(n => n.x - n.width/2)) - 100;
-            const minY = Math.min(...nodes.map(n => n.y - n.height/2)) - 100;
-
-            const svgWidth = maxX - minX;
-            const svgHeight = maxY - minY;
-
-            const svg = `
-                <svg class="mindmap-svg" viewBox="${minX} ${minY} ${svgWidth} ${svgHeight}" xmlns="http://www.w3.org/2000/svg">
-                    <defs>
-                        <marker id="arrowhead" markerWidth="10" markerHeight="7" refX="9" refY="3.5" orient="auto">
-                            <polygon points="0 0, 10 3.5, 0 7" fill="#7f8c8d"/>
-                        </marker>
-                        <filter id="shadow" x="-20%" y="-20%" width="140%" height="140%">
-                            <feDropShadow dx="3" dy="3" flood-color="#00000030"/>
-                        </filter>
-                        <filter id="glow" x="-20%" y="-20%" width="140%" height="140%">
-                            <feGaussianBlur stdDeviation="4" result="coloredBlur"/>
-                            <feMerge>
-                                <feMergeNode in="coloredBlur"/>
-                                <feMergeNode in="SourceGraphic"/>
-                            </feMerge>
-                        </filter>
-                    </defs>
-
-                    ${edges.map(edge => {
-                        const sourceNode = nodes.find(n => n.id === edge.source);
-                        const targetNode = nodes.find(n => n.id === edge.target);
-                        if (!sourceNode || !targetNode) return '';
-
-                        return `
-                            <line class="edge"
-                                x1="${sourceNode.x}" y1="${sourceNode.y}"
-                                x2="${targetNode.x}" y2="${targetNode.y}"
-                                stroke="${edge.color}"
-                                stroke-width="${edge.weight}"
-                                marker-end="url(#arrowhead)"/>
-                            <text x="${(sourceNode.x + targetNode.x) / 2}"
-                                  y="${(sourceNode.y + targetNode.y) / 2 - 8}"
-                                  text-anchor="middle"
-                                  font-size="10"
-                                  fill="#666">${edge.label}</text>
-                        `;
-                    }).join('')}
-
-                    ${nodes.map(node => {
-                        const shapeElement = node.shape === 'circle'
-                            ? `<circle cx="${node.x}" cy="${node.y}" r="${Math.max(node.width, node.height)/2}" fill="${node.color}" filter="url(#shadow)"/>`
-                            : node.shape === 'ellipse' || node.shape === 'rounded_rectangle'
-                            ? `<ellipse cx="${node.x}" cy="${node.y}" rx="${node.width/2}" ry="${node.height/2}" fill="${node.color}" filter="url(#shadow)"/>`
-                            : `<rect x="${node.x - node.width/2}" y="${node.y - node.height/2}" width="${node.width}" height="${node.height}" rx="8" fill="${node.color}" filter="url(#shadow)"/>`;
-
-                        const expandedIndicator = node.details.length > 0 || node.processes.length > 0 || node.considerations.length > 0
-                            ? `<circle cx="${node.x + node.width/2 - 10}" cy="${node.y - node.height/2 + 10}" r="6" fill="white" stroke="${node.color}" stroke-width="2"/>
-                               <text x="${node.x + node.width/2 - 10}" y="${node.y - node.height/2 + 14}" text-anchor="middle" font-size="10" fill="${node.color}">+</text>`
-                            : '';
-
-                        return `
-                            <g class="node ${node.expanded ? 'expanded' : ''}" data-node-id="${node.id}" onclick="handleNodeClick('${node.id}')" onmouseover="showNodeTooltip(event, '${node.id}')" onmouseout="hideNodeTooltip()">
-                                ${shapeElement}
-                                ${expandedIndicator}
-                                <text x="${node.x}" y="${node.y - 5}"
-                                      text-anchor="middle"
-                                      font-size="${node.level === 0 ? '14' : '12'}"
-                                      font-weight="${node.level === 0 ? 'bold' : 'normal'}"
-                                      fill="white">${node.title}</text>
-                                <text x="${node.x}" y="${node.y + 10}"
-                                      text-anchor="middle"
-                                      font-size="9"
-                                      fill="rgba(255,255,255,0.8)">${node.category}</text>
-                            </g>
-                        `;
-                    }).join('')}
-                </svg>
-            `;
-
-            container.innerHTML = svg;
-            resetZoom();
-        }
-
-        function updateNodeDetailsList(nodes) {
-            const detailsList = document.getElementById('node-details-list');
-
-            const detailsHtml = nodes.map(node => `
-                <div class="collapsible" onclick="toggleCollapsible(this)">
-                    <div class="collapsible-header">
-                        <strong>${node.title}</strong> (${node.category})
-                    </div>
-                    <div class="collapsible-content">
-                        <p><strong>Description:</strong> ${node.description}</p>
-
-                        ${node.details.length > 0 ? `
-                            <div><strong>Details:</strong>
-                                <ul>${node.details.map(detail => `<li>${detail}</li>`).join('')}</ul>
-                            </div>
-                        ` : ''}
-
-                        ${node.processes.length > 0 ? `
-                            <div><strong>Processes:</strong>
-                                <ul>${node.processes.map(process => `<li>${process}</li>`).join('')}</ul>
-                            </div>
-                        ` : ''}
-
-                        ${node.considerations.length > 0 ? `
-                            <div><strong>Considerations:</strong>
-                                <ul>${node.considerations.map(consideration => `<li>${consideration}</li>`).join('')}</ul>
-                            </div>
-                        ` : ''}
-                    </div>
-                </div>
-            `).join('');
-
-            detailsList.innerHTML = detailsHtml;
-        }
-
-        function toggleCollapsible(element) {
-            element.classList.toggle('open');
-        }
-
-        function handleNodeClick(nodeId) {
-            console.log('Node clicked:', nodeId);
-            // Could implement node editing here
-        }
-
-        function showNodeTooltip(event, nodeId) {
-            if (!nodeDetailsVisible || !parsedMindmapData) return;
-
-            const node = parsedMindmapData.nodes.find(n => n.id === nodeId);
-            if (!node) return;
-
-            const tooltip = document.getElementById('node-tooltip');
+@app.get("/", response_class=HTMLResponse)
+def serve_frontend(request: Request):
+    """Serve the enhanced frontend HTML interface with editing capabilities"""
+    if request.headers.get("if-none-match") == _FRONTEND_ETAG:
+        return Response(status_code=304, headers=_FRONTEND_HEADERS)
 
-            document.getElementById('tooltip-title').textContent = node.title;
-            document.getElementById('tooltip-description').textContent = node.description;
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(_FRONTEND_GZIP, media_type="text/html; charset=utf-8",
+                        headers={**_FRONTEND_HEADERS, "Content-Encoding": "gzip"})
 
-            const detailsList = document.getElementById('tooltip-details');
-            detailsList.innerHTML = node.details.map(detail => `<li>${detail}</li>`).join('');
+    return Response(_FRONTEND_BYTES, media_type="text/html; charset=utf-8", headers=_FRONTEND_HEADERS)
 
-            const processesList = document.getElementById('tooltip-processes');
-            processesList.innerHTML = node.processes.map(process => `<li>${process}</li>`).join('');
+app.mount("/static", VersionedStaticFiles(directory=STATIC_DIR), name="static")
 
-            const considerationsList = document.getElementById('tooltip-considerations');
-            considerationsList.innerHTML = node.considerations.map(consideration => `<li>${consideration}</li>`).join('');
+# Response bodies are built by the handlers themselves, so the models only document them;
+# returning ORJSONResponse directly skips FastAPI re-validating every response against its model
+@app.get("/health", responses={200: {"model": HealthResponse}})
+async def health_check():
+    """Health check endpoint"""
+    api_key_configured = bool(os.getenv("ANTHROPIC_API_KEY"))
 
-            tooltip.style.left = event.pageX + 10 + 'px';
-            tooltip.style.top = event.pageY + 10 + 'px';
-            tooltip.classList.add('show');
-        }
+    return ORJSONResponse({
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "api_key_configured": api_key_configured
+    })
 
-        function hideNodeTooltip() {
-            document.getElementById('node-tooltip').classList.remove('show');
-        }
+@app.post("/api/generate", responses={200: {"model": MindmapResponse}})
+async def generate_mindmap(request: MindmapRequest):
+    """Generate detailed mindmap from prompt"""
 
-        function toggleNodeDetails() {
-            nodeDetailsVisible = !nodeDetailsVisible;
-            const btn = event.target;
-            btn.textContent = nodeDetailsVisible ? 'ℹ️ Hide Details' : 'ℹ️ Toggle Details';
-        }
+    if not mindmap_generator:
+        raise HTTPException(
+            status_code=500,
+            detail="Mindmap generator not initialized. Please check your ANTHROPIC_API_KEY."
+        )
 
-        function updateXMLEditor(xmlContent) {
-            document.getElementById('xml-editor').value = xmlContent;
-            document.getElementById('raw-xml-display').textContent = xmlContent;
-        }
+    start_time = time.time()
 
-        function updateMetadata(metadata) {
-            const metadataDisplay = document.getElementById('metadata-display');
-
-            // Extract metadata from XML if not provided
-            if (!metadata.timestamp) {
-                try {
-                    const parser = new DOMParser();
-                    const xmlDoc = parser.parseFromString(currentXmlData, 'text/xml');
-                    const metadataNode = xmlDoc.querySelector('metadata');
-
-                    if (metadataNode) {
-                        metadata.timestamp = metadataNode.querySelector('created_at')?.textContent || 'Unknown';
-                        metadata.domain = metadataNode.querySelector('domain')?.textContent || 'General';
-                        metadata.complexity = metadataNode.querySelector('complexity')?.textContent || 'Intermediate';
-                        metadata.total_nodes = metadataNode.querySelector('total_nodes')?.textContent || '0';
-                        metadata.max_depth = metadataNode.querySelector('max_depth')?.textContent || '0';
-                    }
-                } catch (e) {
-                    console.error('Error parsing metadata:', e);
-                }
-            }
-
-            document.getElementById('meta-timestamp').textContent = metadata.timestamp || new Date().toISOString();
-            document.getElementById('meta-domain').textContent = metadata.domain || 'General';
-            document.getElementById('meta-complexity').textContent = metadata.complexity || 'Intermediate';
-            document.getElementById('meta-nodes').textContent = metadata.total_nodes || '0';
-            document.getElementById('meta-depth').textContent = metadata.max_depth || '0';
-
-            metadataDisplay.style.display = 'block';
-        }
+    key = hashlib.blake2b(normalize_prompt(request.prompt).encode(), digest_size=16).digest()
 
-        async function validateXML() {
-            const xmlContent = document.getElementById('xml-editor').value.trim();
-
-            if (!xmlContent) {
-                showStatus('No XML content to validate', 'error');
-                return;
-            }
-
-            try {
-                showStatus('Validating XML...', 'loading');
-
-                const response = await fetch('/api/validate', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify({ xml_content: xmlContent })
-                });
-
-                const data = await response.json();
-
-                if (data.success) {
-                    showStatus('✅ XML is valid!', 'success');
-                    if (data.validated_xml && data.validated_xml !== xmlContent) {
-                        document.getElementById('xml-editor').value = data.validated_xml;
-                        showStatus('✅ XML validated and auto-corrected!', 'success');
-                    }
-                } else {
-                    showStatus(`❌ XML validation failed: ${data.message}`, 'error');
-                }
-
-            } catch (error) {
-                console.error('Validation error:', error);
-                showStatus(`❌ Validation error: ${error.message}`, 'error');
-            }
-        }
+    try:
+        result = _cached_response(key)
+        if result is None:
+            async with _prompt_lock(key):
+                # Another request for the same prompt may have finished while we waited
+                result = _cached_response(key)
+                if result is None:
+                    result, fallback = await _generate_with_metadata(request.prompt)
+                    if not fallback:
+                        _cache_response(key, result)
+
+        xml_content, extracted_metadata, model = result
+        processing_time = time.time() - start_time
 
-        async function applyChanges() {
-            const xmlContent = document.getElementById('xml-editor').value.trim();
-
-            if (!xmlContent) {
-                showStatus('No XML content to apply', 'error');
-                return;
-            }
-
-            try {
-                showStatus('Applying changes...', 'loading');
-                currentXmlData = xmlContent;
-                renderEnhancedMindmap(xmlContent);
-                document.getElementById('raw-xml-display').textContent = xmlContent;
-                showStatus('✅ Changes applied successfully!', 'success');
-            } catch (error) {
-                console.error('Error applying changes:', error);
-                showStatus(`❌ Failed to apply changes: ${error.message}`, 'error');
-            }
-        }
+        return ORJSONResponse({
+            "xml_content": xml_content,
+            "processing_time": processing_time,
+            "metadata": extracted_metadata,
+            "success": True,
+            "model": model
+        })
 
-        function resetXML() {
-            if (originalXmlData) {
-                document.getElementById('xml-editor').value = originalXmlData;
-                currentXmlData = originalXmlData;
-                renderEnhancedMindmap(originalXmlData);
-                document.getElementById('raw-xml-display').textContent = originalXmlData;
-                showStatus('✅ XML reset to original', 'success');
-            } else {
-                showStatus('No original XML to reset to', 'error');
-            }
-        }
+    except Exception as e:
+        logger.exception("❌ Error generating detailed mindmap: %s", e)
 
-        function downloadXML() {
-            const xmlContent = document.getElementById('xml-editor').value.trim();
+        raise HTTPException(
+            status_code=500,
+            detail=f"Detailed mindmap generation failed: {str(e)}"
+        )
 
-            if (!xmlContent) {
-                showStatus('No XML content to download', 'error');
-                return;
-            }
+async def _generate_with_metadata(prompt: str) -> tuple:
+    """Generate the mindmap XML for prompt and extract its metadata and render model.
 
-            const blob = new Blob([xmlContent], { type: 'application/xml' });
-            const url = URL.createObjectURL(blob);
+    Returns the (xml, metadata, model) result and whether a fallback placeholder was used.
+    """
+    logger.info("🔄 Generating detailed mindmap for prompt: '%s...'", prompt[:50])
+    start_time = time.time()
 
-            const a = document.createElement('a');
-            a.href = url;
-            a.download = `mindmap_${new Date().toISOString().slice(0,10)}.xml`;
-            document.body.appendChild(a);
-            a.click();
-            document.body.removeChild(a);
+    # Generate mindmap using the enhanced script
+    async with _GEN_SEM:
+        async for event in mindmap_generator.astream(prompt, preview=False):
+            if event["event"] == "result":
+                xml_content, fallback = event["xml_content"], event["fallback"]
 
-            URL.revokeObjectURL(url);
-            showStatus('✅ XML downloaded successfully!', 'success');
-        }
+    logger.info("✅ Detailed mindmap generated successfully in %.2f seconds", time.time() - start_time)
+    return (xml_content, *_describe(prompt, xml_content)), fallback
 
-        function showStatus(message, type) {
-            const status = document.getElementById('status');
-            status.textContent = message;
-            status.className = `status ${type}`;
-            status.style.display = 'block';
-
-            if (type === 'success') {
-                setTimeout(() => {
-                    status.style.display = 'none';
-                }, 5000);
-            }
-        }
+_LEADING_INT = re.compile(r"\s*([-+]?\d+)")
 
-        function zoomIn() {
-            currentZoom = Math.min(currentZoom * 1.2, 3);
-            applyZoom();
-        }
+def _int_attr(element: Any, name: str, default: int) -> int:
+    """Read an integer attribute the way the frontend's parseInt(...) || default did"""
+    match = _LEADING_INT.match(element.get(name, "")) if element is not None else None
+    return (int(match.group(1)) or default) if match else default
 
-        function zoomOut() {
-            currentZoom = Math.max(currentZoom / 1.2, 0.3);
-            applyZoom();
-        }
+def _attr(element: Any, name: str, default: str) -> str:
+    return (element.get(name) or default) if element is not None else default
 
-        function resetZoom() {
-            currentZoom = 1;
-            applyZoom();
-        }
+def _node_model(node: Any) -> Dict[str, Any]:
+    position = node.find("position")
+    style = node.find("style")
+    content = node.find("content")
+    return {
+        "id": node.get("id"),
+        "level": _int_attr(node, "level", 0),
+        "category": node.get("category") or "general",
+        "expanded": node.get("expanded") == "true",
+        "title": (content.findtext("title") or "Unnamed") if content is not None else "Unnamed",
+        "description": (content.findtext("description") or "") if content is not None else "",
+        "x": _int_attr(position, "x", 400),
+        "y": _int_attr(position, "y", 300),
+        "width": _int_attr(position, "width", 160),
+        "height": _int_attr(position, "height", 60),
+        "color": _attr(style, "color", "#3498db"),
+        "shape": _attr(style, "shape", "rectangle"),
+        "details": [item.text or "" for item in node.iterfind("details/item")],
+        "processes": [step.text or "" for step in node.iterfind("processes/step")],
+        "considerations": [point.text or "" for point in node.iterfind("considerations/point")],
+    }
 
-        function applyZoom() {
-            const svg = document.querySelector('.mindmap-svg');
-            if (svg) {
-                svg.style.transform = `scale(${currentZoom})`;
-                document.getElementById('zoom-info').textContent = `Zoom: ${Math.round(currentZoom * 100)}%`;
-            }
-        }
+def _edge_model(edge: Any) -> Dict[str, Any]:
+    style = edge.find("style")
+    return {
+        "id": edge.get("id"),
+        "source": edge.get("source"),
+        "target": edge.get("target"),
+        "label": edge.findtext("label") or "",
+        "description": edge.findtext("description") or "",
+        "color": _attr(style, "color", "#7f8c8d"),
+        "weight": _int_attr(style, "weight", 2),
+    }
 
-        function downloadSVG() {
-            const svg = document.querySelector('.mindmap-svg');
-            if (!svg) {
-                showStatus('No mindmap to download', 'error');
-                return;
-            }
-
-            const svgData = new XMLSerializer().serializeToString(svg);
-            const blob = new Blob([svgData], { type: 'image/svg+xml' });
-            const url = URL.createObjectURL(blob);
-
-            const a = document.createElement('a');
-            a.href = url;
-            a.download = `mindmap_${new Date().toISOString().slice(0,10)}.svg`;
-            document.body.appendChild(a);
-            a.click();
-            document.body.removeChild(a);
-
-            URL.revokeObjectURL(url);
-            showStatus('✅ Mindmap downloaded successfully!', 'success');
-        }
+def xml_to_model(xml: bytes) -> Dict[str, Any]:
+    """Extract the nodes, edges and metadata the frontend renders from mindmap XML in one pass"""
+    model: Dict[str, Any] = {"nodes": [], "edges": [], "metadata": {}}
+    for _, element in etree.iterparse(BytesIO(xml), events=("end",), tag=("metadata", "node", "edge"),
+                                      resolve_entities=False, no_network=True, huge_tree=False):
+        if element.tag == "node":
+            model["nodes"].append(_node_model(element))
+        elif element.tag == "edge":
+            model["edges"].append(_edge_model(element))
+        elif element.getparent() is not None and element.getparent().getparent() is None:
+            model["metadata"] = {child.tag: child.text for child in element if isinstance(child.tag, str)}
+        # Extracted elements are no longer needed, so the tree doesn't grow with the document
+        element.clear()
+    return model
+
+def _describe(prompt: str, xml_content: str) -> tuple:
+    """Build the response metadata and render model for a generated mindmap"""
+    extracted_metadata = {
+        "prompt_length": len(prompt),
+        "xml_length": len(xml_content),
+        "timestamp": datetime.now().isoformat()
+    }
+    try:
+        model = xml_to_model(xml_content.encode("utf-8"))
+    except etree.XMLSyntaxError as e:
+        logger.warning("Could not extract metadata: %s", e)
+        return extracted_metadata, None
+
+    metadata = model.pop("metadata")
+    extracted_metadata.update(
+        domain=metadata.get("domain") or "general",
+        complexity=metadata.get("complexity") or "intermediate",
+        total_nodes=metadata.get("total_nodes") or "0",
+        max_depth=metadata.get("max_depth") or "0"
+    )
+    return extracted_metadata, model
 
-        // Check server health on page load
-        fetch('/health')
-            .then(response => response.json())
-            .then(data => {
-                if (!data.api_key_configured) {
-                    showStatus('⚠️ API key not configured. Please set ANTHROPIC_API_KEY environment variable.', 'error');
-                }
-            })
-            .catch(error => {
-                showStatus('❌ Cannot connect to server', 'error');
-            });
-    </script>
-</body>
-</html>
-        """
-
-        return HTMLResponse(content=html_content)
+def _ndjson(event: Dict[str, Any]) -> bytes:
+    return orjson.dumps(event) + b"\n"
 
+async def _stream_events(prompt: str, key: bytes) -> AsyncIterator[bytes]:
+    """Yield generation events as NDJSON lines, ending with the final result or an error"""
+    start_time = time.time()
+    try:
+        result = _cached_response(key)
+        if result is None:
+            # Shares the /api/generate lock, so identical requests wait for the leader's cached result
+            # (without previews) instead of each running the full pipeline
+            async with _prompt_lock(key):
+                result = _cached_response(key)
+                if result is None:
+                    logger.info("🔄 Streaming detailed mindmap for prompt: '%s...'", prompt[:50])
+                    async with _GEN_SEM:
+                        async for event in mindmap_generator.astream(prompt):
+                            if event["event"] == "preview":
+                                try:
+                                    event["model"] = xml_to_model(event["xml_content"].encode("utf-8"))
+                                except etree.XMLSyntaxError:
+                                    pass
+                                yield _ndjson(event)
+                            else:
+                                xml_content, fallback = event["xml_content"], event["fallback"]
+                    result = (xml_content, *_describe(prompt, xml_content))
+                    # Fallback placeholders are served but not cached, so the next request retries Claude
+                    if not fallback:
+                        _cache_response(key, result)
+
+        xml_content, extracted_metadata, model = result
+        yield _ndjson({
+            "event": "result",
+            "xml_content": xml_content,
+            "processing_time": time.time() - start_time,
+            "metadata": extracted_metadata,
+            "success": True,
+            "model": model
+        })
     except Exception as e:
-        return HTMLResponse(content=f"<h1>Error loading enhanced interface</h1><p>{str(e)}</p>", status_code=500)
-
-@app.get("/health", response_model=HealthResponse)
-async def health_check():
-    """Health check endpoint"""
-    api_key_configured = bool(os.getenv("ANTHROPIC_API_KEY"))
-
-    return HealthResponse(
-        status="healthy",
-        timestamp=datetime.now().isoformat(),
-        api_key_configured=api_key_configured
-    )
+        # Headers are already sent, so failures are reported in-band
+        logger.exception("❌ Error streaming detailed mindmap: %s", e)
+        yield _ndjson({"event": "error", "error": f"Detailed mindmap generation failed: {str(e)}", "success": False})
 
-@app.post("/api/generate", response_model=MindmapResponse)
-async def generate_mindmap(request: MindmapRequest):
-    """Generate detailed mindmap from prompt"""
+@app.post("/api/generate/stream")
+async def generate_mindmap_stream(request: MindmapRequest):
+    """Generate a detailed mindmap, streaming a local draft before the final XML as NDJSON"""
 
     if not mindmap_generator:
         raise HTTPException(
@@ -1180,142 +516,71 @@ async def generate_mindmap(request: MindmapRequest):
             detail="Mindmap generator not initialized. Please check your ANTHROPIC_API_KEY."
         )
 
-    start_time = time.time()
+    key = hashlib.blake2b(normalize_prompt(request.prompt).encode(), digest_size=16).digest()
+    return StreamingResponse(_stream_events(request.prompt, key), media_type="application/x-ndjson")
 
-    try:
-        print(f"🔄 Generating detailed mindmap for prompt: '{request.prompt[:50]}...'")
+def edit_response(success: bool, message: str, validated_xml: Optional[str] = None) -> ORJSONResponse:
+    """Build an EditResponse-shaped body without a model round-trip"""
+    return ORJSONResponse({"success": success, "message": message, "validated_xml": validated_xml})
 
-        # Generate mindmap using the enhanced script
-        xml_content = await mindmap_generator.generate_mindmap(request.prompt)
-
-        processing_time = time.time() - start_time
-
-        print(f"✅ Detailed mindmap generated successfully in {processing_time:.2f} seconds")
-
-        # Extract additional metadata from XML
-        try:
-            from xml.etree import ElementTree as ET
-            root = ET.fromstring(xml_content)
-            metadata_elem = root.find('metadata')
-
-            extracted_metadata = {
-                "prompt_length": len(request.prompt),
-                "xml_length": len(xml_content),
-                "timestamp": datetime.now().isoformat(),
-                "domain": metadata_elem.find('domain').text if metadata_elem is not None and metadata_elem.find('domain') is not None else "general",
-                "complexity": metadata_elem.find('complexity').text if metadata_elem is not None and metadata_elem.find('complexity') is not None else "intermediate",
-                "total_nodes": metadata_elem.find('total_nodes').text if metadata_elem is not None and metadata_elem.find('total_nodes') is not None else "0",
-                "max_depth": metadata_elem.find('max_depth').text if metadata_elem is not None and metadata_elem.find('max_depth') is not None else "0"
-            }
-        except Exception as e:
-            print(f"Warning: Could not extract metadata: {e}")
-            extracted_metadata = {
-                "prompt_length": len(request.prompt),
-                "xml_length": len(xml_content),
-                "timestamp": datetime.now().isoformat()
-            }
-
-        return MindmapResponse(
-            xml_content=xml_content,
-            processing_time=processing_time,
-            metadata=extracted_metadata,
-            success=True
-        )
-
-    except Exception as e:
-        processing_time = time.time() - start_time
-        error_trace = traceback.format_exc()
-
-        print(f"❌ Error generating detailed mindmap: {e}")
-        print(f"📝 Full traceback:\n{error_trace}")
-
-        raise HTTPException(
-            status_code=500,
-            detail=f"Detailed mindmap generation failed: {str(e)}"
-        )
+@functools.lru_cache(maxsize=32)
+def _xml_syntax_error(xml_content: str) -> Optional[str]:
+    """Return why xml_content is not well-formed, or None if it is; users often re-validate the same text"""
+    try:
+        etree.fromstring(xml_content.encode("utf-8"), _XML_PARSER)
+    except etree.XMLSyntaxError as e:
+        return str(e)
+    return None
 
-@app.post("/api/validate", response_model=EditResponse)
+@app.post("/api/validate", responses={200: {"model": EditResponse}})
 async def validate_xml(request: EditRequest):
     """Validate and optionally correct XML content"""
 
     try:
-        from xml.etree import ElementTree as ET
-
         # Try to parse the XML
-        try:
-            ET.fromstring(request.xml_content)
-            return EditResponse(
-                success=True,
-                message="XML is valid",
-                validated_xml=request.xml_content
-            )
-        except ET.ParseError as e:
-            # If basic parsing fails, try to auto-correct common issues
-            corrected_xml = await auto_correct_xml(request.xml_content)
-
-            if corrected_xml:
-                try:
-                    ET.fromstring(corrected_xml)
-                    return EditResponse(
-                        success=True,
-                        message="XML was invalid but has been auto-corrected",
-                        validated_xml=corrected_xml
-                    )
-                except ET.ParseError:
-                    pass
-
-            return EditResponse(
-                success=False,
-                message=f"XML validation failed: {str(e)}",
-                validated_xml=None
-            )
+        syntax_error = _xml_syntax_error(request.xml_content)
+        if syntax_error is None:
+            return edit_response(True, "XML is valid", request.xml_content)
+
+        # If basic parsing fails, try to auto-correct common issues
+        corrected_xml = await auto_correct_xml(request.xml_content)
+
+        if corrected_xml and _xml_syntax_error(corrected_xml) is None:
+            return edit_response(True, "XML was invalid but has been auto-corrected", corrected_xml)
+
+        return edit_response(False, f"XML validation failed: {syntax_error}")
 
     except Exception as e:
-        return EditResponse(
-            success=False,
-            message=f"Validation error: {str(e)}",
-            validated_xml=None
-        )
+        return edit_response(False, f"Validation error: {str(e)}")
+
+# Corrections keyed by a digest of the broken XML, so re-validating it skips the API round-trip
+CORRECTION_CACHE_SIZE = 128
+_CORRECTION_CACHE: "OrderedDict[bytes, str]" = OrderedDict()
 
 async def auto_correct_xml(xml_content: str) -> Optional[str]:
     """Attempt to auto-correct common XML issues"""
     if not mindmap_generator:
         return None
 
-    try:
-        correction_prompt = f"""
-        Fix this XML content to make it valid and well-formed:
-
-        {xml_content}
-
-        Common issues to fix:
-        - Unclosed tags
-        - Mismatched tags
-        - Invalid characters in attribute values
-        - Missing quotes around attributes
-        - Improper nesting
-
-        Return ONLY the corrected XML, no explanations.
-        """
+    key = hashlib.blake2b(xml_content.encode("utf-8"), digest_size=16).digest()
+    corrected_xml = _CORRECTION_CACHE.get(key)
+    if corrected_xml is not None:
+        _CORRECTION_CACHE.move_to_end(key)
+        return corrected_xml
 
-        response = await mindmap_generator.client.messages.create(
-            model="claude-3-5-haiku-20241022",
-            max_tokens=4000,
-            messages=[{"role": "user", "content": correction_prompt}]
-        )
-
-        corrected_xml = response.content[0].text.strip()
-
-        # Clean up if it has markdown formatting
-        if corrected_xml.startswith('```xml'):
-            corrected_xml = corrected_xml[6:]
-        if corrected_xml.endswith('```'):
-            corrected_xml = corrected_xml[:-3]
+    try:
+        corrected_xml = await mindmap_generator.correct_xml(xml_content)
+        if corrected_xml is None:
+            return None
 
-        return corrected_xml.strip()
+        # Failed calls are not cached, so a transient API error is retried next time
+        _CORRECTION_CACHE[key] = corrected_xml
+        if len(_CORRECTION_CACHE) > CORRECTION_CACHE_SIZE:
+            _CORRECTION_CACHE.popitem(last=False)
+        return corrected_xml
 
     except Exception as e:
-        print(f"Auto-correction failed: {e}")
+        logger.warning("Auto-correction failed: %s", e)
         return None
 
 @app.get("/api/test")
@@ -1334,10 +599,20 @@ if __name__ == "__main__":
     print("🌐 The enhanced web interface will be available at: http://localhost:8000")
     print("✨ New features: Detailed nodes, XML editing, interactive tooltips")
 
+    # Per-request access logging costs more CPU than most handlers here, so it is off by default;
+    # reload stays a development-only option, and workers default to one per CPU, as in run_server.py
+    if os.getenv("DEV"):
+        options = {"reload": True, "log_level": "info"}
+    else:
+        options = {
+            "workers": int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+            "access_log": False,
+            "log_level": LOG_LEVEL.lower()
+        }
+
     uvicorn.run(
         "server:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
-        log_level="info"
+        **options
     )
\ No newline at end of file
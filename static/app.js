@@ -0,0 +1,705 @@
+let currentZoom = 1;
+let baseViewBox = null;
+let currentXmlData = null;
+let originalXmlData = null;
+let originalModel = null;
+let nodeDetailsVisible = false;
+let parsedMindmapData = null;
+let renderedXmlKey = null;
+let tooltipNode = null;
+let tooltipFrame = 0;
+let tooltipX = 0;
+let tooltipY = 0;
+
+// The script loads at the end of <body>, so fixed elements are looked up once here
+const el = {
+    prompt: document.getElementById('prompt'),
+    btnText: document.getElementById('btn-text'),
+    mindmapContainer: document.getElementById('mindmap-container'),
+    nodeDetailsList: document.getElementById('node-details-list'),
+    tooltip: document.getElementById('node-tooltip'),
+    tooltipTitle: document.getElementById('tooltip-title'),
+    tooltipDescription: document.getElementById('tooltip-description'),
+    tooltipDetails: document.getElementById('tooltip-details'),
+    tooltipProcesses: document.getElementById('tooltip-processes'),
+    tooltipConsiderations: document.getElementById('tooltip-considerations'),
+    xmlEditor: document.getElementById('xml-editor'),
+    rawXmlDisplay: document.getElementById('raw-xml-display'),
+    metadataDisplay: document.getElementById('metadata-display'),
+    metaTimestamp: document.getElementById('meta-timestamp'),
+    metaDomain: document.getElementById('meta-domain'),
+    metaComplexity: document.getElementById('meta-complexity'),
+    metaNodes: document.getElementById('meta-nodes'),
+    metaDepth: document.getElementById('meta-depth'),
+    status: document.getElementById('status'),
+    zoomInfo: document.getElementById('zoom-info')
+};
+
+const detailedSamplePrompts = [
+    "Create a comprehensive mindmap for designing a machine learning system to predict customer churn for a SaaS company. Include detailed data collection strategies, feature engineering techniques, model selection criteria, cross-validation approaches, deployment pipeline components, A/B testing frameworks, monitoring systems, alert mechanisms, and business impact measurement methods with specific KPIs.",
+    "Design a detailed mindmap for a scalable microservices architecture including service decomposition strategies, API gateway patterns, database per service patterns, event-driven communication, circuit breaker implementations, distributed tracing, service mesh configurations, container orchestration, security measures, monitoring solutions, and deployment strategies with CI/CD pipeline details.",
+    "Create a comprehensive mindmap for learning data science from scratch, covering mathematical foundations (statistics, linear algebra, calculus), programming languages (Python, R, SQL), data manipulation libraries, visualization tools, machine learning algorithms (supervised, unsupervised, reinforcement), deep learning frameworks, model evaluation techniques, deployment strategies, career paths, and industry applications with specific project examples."
+];
+
+function loadDetailedSample(index) {
+    el.prompt.value = detailedSamplePrompts[index];
+}
+
+function switchTab(tabName) {
+    // Remove active class from all tabs and content
+    document.querySelectorAll('.tab').forEach(tab => tab.classList.remove('active'));
+    document.querySelectorAll('.tab-content').forEach(content => content.classList.remove('active'));
+
+    // Add active class to selected tab and content
+    event.target.classList.add('active');
+    document.getElementById(tabName + '-tab').classList.add('active');
+}
+
+function switchEditorTab(tabName) {
+    // Remove active class from editor tabs and content
+    const editorPanel = document.querySelector('.editor-panel');
+    editorPanel.querySelectorAll('.tab').forEach(tab => tab.classList.remove('active'));
+    editorPanel.querySelectorAll('.tab-content').forEach(content => content.classList.remove('active'));
+
+    // Add active class to selected tab and content
+    event.target.classList.add('active');
+    document.getElementById(tabName + '-editor-tab').classList.add('active');
+
+    if (tabName === 'raw' && currentXmlData) {
+        updateRawXml(currentXmlData);
+    }
+}
+
+async function generateMindmap() {
+    const prompt = el.prompt.value.trim();
+
+    if (!prompt) {
+        showStatus('Please enter a detailed mindmap description', 'error');
+        return;
+    }
+
+    const btn = document.querySelector('.generate-btn');
+    const btnText = el.btnText;
+
+    btn.disabled = true;
+    btnText.textContent = '⏳ Generating Detailed Mindmap...';
+    showStatus('Generating your detailed mindmap... This may take 60-90 seconds for comprehensive analysis.', 'loading');
+
+    try {
+        const response = await fetch('/api/generate/stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ prompt: prompt })
+        });
+
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        // Events arrive as NDJSON: an optional draft preview, then the final result or an error
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffered = '';
+        let data = null;
+
+        while (!data) {
+            const { value, done } = await reader.read();
+            if (done && !buffered) break;
+            buffered += decoder.decode(value || new Uint8Array(), { stream: !done });
+
+            const lines = buffered.split('\n');
+            buffered = done ? '' : lines.pop();
+
+            for (const line of lines) {
+                if (!line.trim()) continue;
+                const event = JSON.parse(line);
+                if (event.event === 'preview') {
+                    renderEnhancedMindmap(event.xml_content, event.model);
+                    showStatus('Draft layout ready, refining details...', 'loading');
+                } else {
+                    data = event;
+                }
+            }
+        }
+
+        if (!data) {
+            throw new Error('Stream ended before a result was received');
+        }
+
+        if (data.success) {
+            currentXmlData = data.xml_content;
+            originalXmlData = data.xml_content;
+            originalModel = data.model || null;
+
+            renderEnhancedMindmap(data.xml_content, originalModel);
+            updateXMLEditor(data.xml_content);
+            updateMetadata(data.metadata);
+
+            showStatus(`✅ Detailed mindmap generated in ${data.processing_time.toFixed(1)}s!`, 'success');
+        } else {
+            throw new Error(data.error || 'Generation failed');
+        }
+
+    } catch (error) {
+        console.error('Generation error:', error);
+        showStatus(`❌ Failed to generate mindmap: ${error.message}`, 'error');
+    } finally {
+        btn.disabled = false;
+        btnText.textContent = '🚀 Generate Detailed Mindmap';
+    }
+}
+
+// 32-bit FNV-1a over UTF-16 code units; paired with the length it identifies what is on screen
+function fnv1a(text) {
+    let hash = 0x811c9dc5;
+    for (let i = 0; i < text.length; i++) {
+        hash ^= text.charCodeAt(i);
+        hash = Math.imul(hash, 0x01000193);
+    }
+    return hash >>> 0;
+}
+
+// The server ships a prebuilt model with generated mindmaps; XML is only parsed here after edits
+function renderEnhancedMindmap(xmlContent, model = null) {
+    try {
+        // Re-applying or resetting to the XML already drawn leaves the SVG and details list as they are
+        const xmlKey = xmlContent.length + ':' + fnv1a(xmlContent);
+        if (xmlKey === renderedXmlKey) {
+            resetZoom();
+            return;
+        }
+
+        const { nodes, edges } = model || parseMindmapXml(xmlContent);
+        // Indexed once per render for edge endpoints and hover lookups; the first node wins on duplicate ids
+        const nodeById = new Map();
+        for (const node of nodes) {
+            if (!nodeById.has(node.id)) nodeById.set(node.id, node);
+        }
+        parsedMindmapData = { nodes, edges, nodeById };
+        drawEnhancedMindmap(nodes, edges, nodeById);
+        updateNodeDetailsList(nodes);
+        renderedXmlKey = xmlKey;
+
+    } catch (error) {
+        console.error('XML parsing error:', error);
+        showStatus('❌ Failed to parse detailed mindmap data', 'error');
+    }
+}
+
+// Parsed documents are only ever read, so recent ones are shared between the render and metadata paths
+const parsedXmlDocs = new Map();
+const PARSED_XML_DOCS_LIMIT = 8;
+
+function parseXmlDocument(xmlContent) {
+    const key = xmlContent.length + ':' + fnv1a(xmlContent);
+    let xmlDoc = parsedXmlDocs.get(key);
+    if (!xmlDoc) {
+        xmlDoc = new DOMParser().parseFromString(xmlContent, 'text/xml');
+        if (parsedXmlDocs.size >= PARSED_XML_DOCS_LIMIT) {
+            parsedXmlDocs.delete(parsedXmlDocs.keys().next().value);
+        }
+        parsedXmlDocs.set(key, xmlDoc);
+    }
+    return xmlDoc;
+}
+
+function parseMindmapXml(xmlContent) {
+    const xmlDoc = parseXmlDocument(xmlContent);
+
+    const parseError = xmlDoc.querySelector('parsererror');
+    if (parseError) {
+        throw new Error('Invalid XML format');
+    }
+
+    // Extract enhanced data from XML
+    const nodes = Array.from(xmlDoc.querySelectorAll('node')).map(node => {
+        const position = node.querySelector('position');
+        const style = node.querySelector('style');
+        const content = node.querySelector('content');
+
+        return {
+            id: node.getAttribute('id'),
+            level: parseInt(node.getAttribute('level')) || 0,
+            category: node.getAttribute('category') || 'general',
+            expanded: node.getAttribute('expanded') === 'true',
+            title: content ? content.querySelector('title')?.textContent || 'Unnamed' : 'Unnamed',
+            description: content ? content.querySelector('description')?.textContent || '' : '',
+            x: position ? parseInt(position.getAttribute('x')) || 400 : 400,
+            y: position ? parseInt(position.getAttribute('y')) || 300 : 300,
+            width: position ? parseInt(position.getAttribute('width')) || 160 : 160,
+            height: position ? parseInt(position.getAttribute('height')) || 60 : 60,
+            color: style ? style.getAttribute('color') || '#3498db' : '#3498db',
+            shape: style ? style.getAttribute('shape') || 'rectangle' : 'rectangle',
+            details: Array.from(node.querySelectorAll('details item')).map(item => item.textContent),
+            processes: Array.from(node.querySelectorAll('processes step')).map(step => step.textContent),
+            considerations: Array.from(node.querySelectorAll('considerations point')).map(point => point.textContent)
+        };
+    });
+
+    const edges = Array.from(xmlDoc.querySelectorAll('edge')).map(edge => {
+        const style = edge.querySelector('style');
+        return {
+            id: edge.getAttribute('id'),
+            source: edge.getAttribute('source'),
+            target: edge.getAttribute('target'),
+            label: edge.querySelector('label')?.textContent || '',
+            description: edge.querySelector('description')?.textContent || '',
+            color: style ? style.getAttribute('color') || '#7f8c8d' : '#7f8c8d',
+            weight: style ? parseInt(style.getAttribute('weight')) || 2 : 2
+        };
+    });
+
+    return { nodes, edges };
+}
+
+// Round derived coordinates to 2 decimals; integers pass through unchanged and trailing zeros are dropped
+const round2 = n => Math.round(n * 100) / 100;
+
+// Arrowhead marker and node filters are the same for every render, so the markup is built once
+const SVG_DEFS = [
+    '<defs>',
+    '<marker id="arrowhead" markerWidth="10" markerHeight="7" refX="9" refY="3.5" orient="auto">',
+    '<polygon points="0 0, 10 3.5, 0 7" fill="#7f8c8d"/>',
+    '</marker>',
+    '<filter id="shadow" x="-20%" y="-20%" width="140%" height="140%">',
+    '<feDropShadow dx="3" dy="3" flood-color="#00000030"/>',
+    '</filter>',
+    '<filter id="glow" x="-20%" y="-20%" width="140%" height="140%">',
+    '<feGaussianBlur stdDeviation="4" result="coloredBlur"/>',
+    '<feMerge><feMergeNode in="coloredBlur"/><feMergeNode in="SourceGraphic"/></feMerge>',
+    '</filter>',
+    '</defs>'
+].join('');
+
+function drawEnhancedMindmap(nodes, edges, nodeById) {
+    const container = el.mindmapContainer;
+
+    if (nodes.length === 0) {
+        container.innerHTML = '<div style="display: flex; align-items: center; justify-content: center; height: 100%; color: #999;">No nodes to display</div>';
+        return;
+    }
+
+    // Calculate SVG dimensions with padding in one pass, keeping each node's half-size for the shapes below
+    let minX = Infinity, minY = Infinity, maxX = -Infinity, maxY = -Infinity;
+    for (const node of nodes) {
+        node._hw = node.width / 2;
+        node._hh = node.height / 2;
+        minX = Math.min(minX, node.x - node._hw);
+        maxX = Math.max(maxX, node.x + node._hw);
+        minY = Math.min(minY, node.y - node._hh);
+        maxY = Math.max(maxY, node.y + node._hh);
+    }
+    minX -= 100;
+    minY -= 100;
+
+    const svgWidth = round2(maxX + 100 - minX);
+    const svgHeight = round2(maxY + 100 - minY);
+    baseViewBox = [round2(minX), round2(minY), svgWidth, svgHeight];
+
+    // Built as one flat array of primitive pieces joined once, instead of nested template literals
+    const parts = [];
+    parts.push(
+        '<svg class="mindmap-svg" viewBox="', baseViewBox.join(' '), '" xmlns="http://www.w3.org/2000/svg">',
+        SVG_DEFS
+    );
+
+    // Attributes shared by every edge label or node text sit once on the enclosing group
+    parts.push('<g class="edges" text-anchor="middle" font-size="10" fill="#666">');
+    for (const edge of edges) {
+        const sourceNode = nodeById.get(edge.source);
+        const targetNode = nodeById.get(edge.target);
+        if (!sourceNode || !targetNode) continue;
+
+        parts.push(
+            '<line class="edge" x1="', sourceNode.x, '" y1="', sourceNode.y,
+            '" x2="', targetNode.x, '" y2="', targetNode.y,
+            '" stroke="', edge.color, '" stroke-width="', edge.weight, '" marker-end="url(#arrowhead)"/>',
+            '<text x="', round2((sourceNode.x + targetNode.x) / 2), '" y="', round2((sourceNode.y + targetNode.y) / 2 - 8),
+            '">', edge.label, '</text>'
+        );
+    }
+    parts.push('</g>', '<g class="nodes" text-anchor="middle" font-size="12" fill="white">');
+
+    for (const node of nodes) {
+        parts.push(
+            '<g class="node ', node.expanded ? 'expanded' : '', '" data-node-id="', node.id,
+            '" onclick="handleNodeClick(\'', node.id, '\')" onmouseover="showNodeTooltip(event, \'', node.id,
+            '\')" onmouseout="hideNodeTooltip()">'
+        );
+
+        if (node.shape === 'circle') {
+            parts.push('<circle cx="', node.x, '" cy="', node.y, '" r="', round2(Math.max(node._hw, node._hh)),
+                       '" fill="', node.color, '" filter="url(#shadow)"/>');
+        } else if (node.shape === 'ellipse' || node.shape === 'rounded_rectangle') {
+            parts.push('<ellipse cx="', node.x, '" cy="', node.y, '" rx="', round2(node._hw), '" ry="', round2(node._hh),
+                       '" fill="', node.color, '" filter="url(#shadow)"/>');
+        } else {
+            parts.push('<rect x="', round2(node.x - node._hw), '" y="', round2(node.y - node._hh),
+                       '" width="', node.width, '" height="', node.height,
+                       '" rx="8" fill="', node.color, '" filter="url(#shadow)"/>');
+        }
+
+        if (node.details.length > 0 || node.processes.length > 0 || node.considerations.length > 0) {
+            const cornerX = round2(node.x + node._hw - 10);
+            const cornerY = round2(node.y - node._hh);
+            parts.push(
+                '<circle cx="', cornerX, '" cy="', cornerY + 10, '" r="6" stroke="', node.color, '" stroke-width="2"/>',
+                '<text x="', cornerX, '" y="', cornerY + 14, '" font-size="10" fill="', node.color, '">+</text>'
+            );
+        }
+
+        parts.push(
+            '<text x="', node.x, '" y="', node.y - 5,
+            node.level === 0 ? '" font-size="14" font-weight="bold">' : '">', node.title, '</text>',
+            '<text x="', node.x, '" y="', node.y + 10,
+            '" font-size="9" fill="rgba(255,255,255,0.8)">', node.category, '</text>',
+            '</g>'
+        );
+    }
+
+    parts.push('</g>', '</svg>');
+
+    container.innerHTML = parts.join('');
+    resetZoom();
+}
+
+// Generated text is assigned with textContent, so it is never parsed as markup
+function createElementWithText(tag, text) {
+    const element = document.createElement(tag);
+    element.textContent = text;
+    return element;
+}
+
+function appendListSection(parent, label, items) {
+    if (items.length === 0) return;
+    const section = document.createElement('div');
+    section.append(createElementWithText('strong', label));
+    const list = document.createElement('ul');
+    list.appendChild(buildListFragment(items));
+    section.appendChild(list);
+    parent.appendChild(section);
+}
+
+function updateNodeDetailsList(nodes) {
+    const detailsList = el.nodeDetailsList;
+    const fragment = document.createDocumentFragment();
+
+    for (const node of nodes) {
+        const collapsible = document.createElement('div');
+        collapsible.className = 'collapsible';
+        collapsible.onclick = () => toggleCollapsible(collapsible);
+
+        const header = document.createElement('div');
+        header.className = 'collapsible-header';
+        header.append(createElementWithText('strong', node.title), ' (' + node.category + ')');
+
+        const content = document.createElement('div');
+        content.className = 'collapsible-content';
+        const description = document.createElement('p');
+        description.append(createElementWithText('strong', 'Description:'), ' ' + node.description);
+        content.appendChild(description);
+        appendListSection(content, 'Details:', node.details);
+        appendListSection(content, 'Processes:', node.processes);
+        appendListSection(content, 'Considerations:', node.considerations);
+
+        collapsible.append(header, content);
+        fragment.appendChild(collapsible);
+    }
+
+    detailsList.replaceChildren(fragment);
+}
+
+function toggleCollapsible(element) {
+    element.classList.toggle('open');
+}
+
+function handleNodeClick(nodeId) {
+    console.log('Node clicked:', nodeId);
+    // Could implement node editing here
+}
+
+// Tooltip <li> items are built once per node, on its first hover, and cloned from then on
+function buildListFragment(items) {
+    const fragment = document.createDocumentFragment();
+    for (const item of items) {
+        const li = document.createElement('li');
+        li.textContent = item;
+        fragment.appendChild(li);
+    }
+    return fragment;
+}
+
+function showNodeTooltip(event, nodeId) {
+    if (!nodeDetailsVisible || !parsedMindmapData) return;
+
+    const node = parsedMindmapData.nodeById.get(nodeId);
+    if (!node) return;
+
+    const tooltip = el.tooltip;
+
+    // Hovering the node already shown only moves the tooltip
+    if (node !== tooltipNode) {
+        tooltipNode = node;
+        el.tooltipTitle.textContent = node.title;
+        el.tooltipDescription.textContent = node.description;
+
+        if (!node._tooltipLists) {
+            node._tooltipLists = [node.details, node.processes, node.considerations].map(buildListFragment);
+        }
+        el.tooltipDetails.replaceChildren(node._tooltipLists[0].cloneNode(true));
+        el.tooltipProcesses.replaceChildren(node._tooltipLists[1].cloneNode(true));
+        el.tooltipConsiderations.replaceChildren(node._tooltipLists[2].cloneNode(true));
+    }
+
+    // Position writes are coalesced into one per animation frame
+    tooltipX = event.pageX + 10;
+    tooltipY = event.pageY + 10;
+    if (!tooltipFrame) {
+        tooltipFrame = requestAnimationFrame(() => {
+            tooltipFrame = 0;
+            tooltip.style.transform = 'translate(' + tooltipX + 'px, ' + tooltipY + 'px)';
+            tooltip.classList.add('show');
+        });
+    }
+}
+
+function hideNodeTooltip() {
+    if (tooltipFrame) {
+        cancelAnimationFrame(tooltipFrame);
+        tooltipFrame = 0;
+    }
+    el.tooltip.classList.remove('show');
+}
+
+function toggleNodeDetails() {
+    nodeDetailsVisible = !nodeDetailsVisible;
+    const btn = event.target;
+    btn.textContent = nodeDetailsVisible ? 'ℹ️ Hide Details' : 'ℹ️ Toggle Details';
+}
+
+// Writing an unchanged string still resets the textarea caret and repaints the pane, so skip it
+function updateXMLEditor(xmlContent) {
+    if (el.xmlEditor.value !== xmlContent) el.xmlEditor.value = xmlContent;
+    updateRawXml(xmlContent);
+}
+
+function updateRawXml(xmlContent) {
+    if (el.rawXmlDisplay.textContent !== xmlContent) el.rawXmlDisplay.textContent = xmlContent;
+}
+
+function updateMetadata(metadata) {
+    const metadataDisplay = el.metadataDisplay;
+
+    // Extract metadata from XML if not provided
+    if (!metadata.timestamp) {
+        try {
+            const xmlDoc = parseXmlDocument(currentXmlData);
+            const metadataNode = xmlDoc.querySelector('metadata');
+
+            if (metadataNode) {
+                metadata.timestamp = metadataNode.querySelector('created_at')?.textContent || 'Unknown';
+                metadata.domain = metadataNode.querySelector('domain')?.textContent || 'General';
+                metadata.complexity = metadataNode.querySelector('complexity')?.textContent || 'Intermediate';
+                metadata.total_nodes = metadataNode.querySelector('total_nodes')?.textContent || '0';
+                metadata.max_depth = metadataNode.querySelector('max_depth')?.textContent || '0';
+            }
+        } catch (e) {
+            console.error('Error parsing metadata:', e);
+        }
+    }
+
+    el.metaTimestamp.textContent = metadata.timestamp || new Date().toISOString();
+    el.metaDomain.textContent = metadata.domain || 'General';
+    el.metaComplexity.textContent = metadata.complexity || 'Intermediate';
+    el.metaNodes.textContent = metadata.total_nodes || '0';
+    el.metaDepth.textContent = metadata.max_depth || '0';
+
+    metadataDisplay.style.display = 'block';
+}
+
+async function validateXML() {
+    const xmlContent = el.xmlEditor.value.trim();
+
+    if (!xmlContent) {
+        showStatus('No XML content to validate', 'error');
+        return;
+    }
+
+    try {
+        showStatus('Validating XML...', 'loading');
+
+        const response = await fetch('/api/validate', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ xml_content: xmlContent })
+        });
+
+        const data = await response.json();
+
+        if (data.success) {
+            showStatus('✅ XML is valid!', 'success');
+            if (data.validated_xml && data.validated_xml !== xmlContent) {
+                el.xmlEditor.value = data.validated_xml;
+                showStatus('✅ XML validated and auto-corrected!', 'success');
+            }
+        } else {
+            showStatus(`❌ XML validation failed: ${data.message}`, 'error');
+        }
+
+    } catch (error) {
+        console.error('Validation error:', error);
+        showStatus(`❌ Validation error: ${error.message}`, 'error');
+    }
+}
+
+async function applyChanges() {
+    const xmlContent = el.xmlEditor.value.trim();
+
+    if (!xmlContent) {
+        showStatus('No XML content to apply', 'error');
+        return;
+    }
+
+    try {
+        showStatus('Applying changes...', 'loading');
+        currentXmlData = xmlContent;
+        renderEnhancedMindmap(xmlContent);
+        updateRawXml(xmlContent);
+        showStatus('✅ Changes applied successfully!', 'success');
+    } catch (error) {
+        console.error('Error applying changes:', error);
+        showStatus(`❌ Failed to apply changes: ${error.message}`, 'error');
+    }
+}
+
+// Trailing-edge debounce: bursts of clicks re-parse and re-render (or hit /api/validate) only once
+const debounce = (fn, ms) => {
+    let timer;
+    return (...args) => {
+        clearTimeout(timer);
+        timer = setTimeout(() => fn(...args), ms);
+    };
+};
+
+// The editor buttons call these globals, so rebinding them debounces the onclick handlers too
+window.applyChanges = debounce(applyChanges, 200);
+window.validateXML = debounce(validateXML, 300);
+
+function resetXML() {
+    if (originalXmlData) {
+        currentXmlData = originalXmlData;
+        renderEnhancedMindmap(originalXmlData, originalModel);
+        updateXMLEditor(originalXmlData);
+        showStatus('✅ XML reset to original', 'success');
+    } else {
+        showStatus('No original XML to reset to', 'error');
+    }
+}
+
+function downloadXML() {
+    const xmlContent = el.xmlEditor.value.trim();
+
+    if (!xmlContent) {
+        showStatus('No XML content to download', 'error');
+        return;
+    }
+
+    const blob = new Blob([xmlContent], { type: 'application/xml' });
+    const url = URL.createObjectURL(blob);
+
+    const a = document.createElement('a');
+    a.href = url;
+    a.download = `mindmap_${new Date().toISOString().slice(0,10)}.xml`;
+    document.body.appendChild(a);
+    a.click();
+    document.body.removeChild(a);
+
+    URL.revokeObjectURL(url);
+    showStatus('✅ XML downloaded successfully!', 'success');
+}
+
+function showStatus(message, type) {
+    const status = el.status;
+    status.textContent = message;
+    status.className = `status ${type}`;
+    status.style.display = 'block';
+
+    if (type === 'success') {
+        setTimeout(() => {
+            status.style.display = 'none';
+        }, 5000);
+    }
+}
+
+function zoomIn() {
+    currentZoom = Math.min(currentZoom * 1.2, 3);
+    applyZoom();
+}
+
+function zoomOut() {
+    currentZoom = Math.max(currentZoom / 1.2, 0.3);
+    applyZoom();
+}
+
+function resetZoom() {
+    currentZoom = 1;
+    applyZoom();
+}
+
+function applyZoom() {
+    const svg = document.querySelector('.mindmap-svg');
+    if (svg && baseViewBox) {
+        // Zooming the viewBox about its centre re-renders the vectors instead of scaling a raster layer
+        const [x, y, width, height] = baseViewBox;
+        const zoomedWidth = width / currentZoom;
+        const zoomedHeight = height / currentZoom;
+        svg.setAttribute('viewBox', [
+            round2(x + (width - zoomedWidth) / 2),
+            round2(y + (height - zoomedHeight) / 2),
+            round2(zoomedWidth),
+            round2(zoomedHeight)
+        ].join(' '));
+        el.zoomInfo.textContent = `Zoom: ${Math.round(currentZoom * 100)}%`;
+    }
+}
+
+function downloadSVG() {
+    const svg = document.querySelector('.mindmap-svg');
+    if (!svg) {
+        showStatus('No mindmap to download', 'error');
+        return;
+    }
+
+    // SVG collapses whitespace in text by default, so runs of spaces and gaps between tags can go
+    const svgData = new XMLSerializer().serializeToString(svg)
+        .replace(/>\s+</g, '><')
+        .replace(/\s{2,}/g, ' ');
+    const blob = new Blob([svgData], { type: 'image/svg+xml' });
+    const url = URL.createObjectURL(blob);
+
+    const a = document.createElement('a');
+    a.href = url;
+    a.download = `mindmap_${new Date().toISOString().slice(0,10)}.svg`;
+    document.body.appendChild(a);
+    a.click();
+    document.body.removeChild(a);
+
+    URL.revokeObjectURL(url);
+    showStatus('✅ Mindmap downloaded successfully!', 'success');
+}
+
+// Check server health on page load
+fetch('/health')
+    .then(response => response.json())
+    .then(data => {
+        if (!data.api_key_configured) {
+            showStatus('⚠️ API key not configured. Please set ANTHROPIC_API_KEY environment variable.', 'error');
+        }
+    })
+    .catch(error => {
+        showStatus('❌ Cannot connect to server', 'error');
+    });